@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 
 st.set_page_config(
     page_title="Home - Análise ENADE 2023",
@@ -23,16 +21,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data
-def load_data():
-    try:
-        return pd.read_parquet("data/processed/dados_gerais_estudantes.parquet")
-    except FileNotFoundError:
-        return None
-
-df = load_data()
-
-
 # Cabeçalho
 st.header('Análise de dados do ENADE 2023')
 st.subheader('Prova prática - Processo seletivo CAEd')
@@ -0,0 +1,231 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import streamlit as st
+from geometrias import ARQUIVO_GEOMETRIAS_UF, nivel_para_tamanho
+
+# Datasets gerados pelo ETL, particionados por edição em pastas NU_ANO=<ano>.
+DIRETORIO_DADOS_GERAIS = "data/processed/dados_gerais_estudantes"
+DIRETORIO_CUBO = "data/processed/cubo_estudantes"
+DIRETORIO_IDH_NOTAS = "data/processed/idh_notas_uf"
+DIRETORIO_NOTAS_MUNICIPIOS = "data/processed/notas_municipios"
+
+# Colunas que viram pastas no dataset de estudantes, com o tipo gravado pelo ETL: sem o
+# esquema explícito o leitor as devolve como categorias de int32.
+PARTICOES_DADOS_GERAIS = ds.partitioning(pa.schema([('NU_ANO', pa.int32()), ('CO_REGIAO_CURSO', pa.uint8())]), flavor='hive')
+
+# Cubo, IDH e Juiz de Fora são gravados em Arrow IPC (uma tabela por edição) e abertos
+# por memory map: as páginas de todas as sessões leem as mesmas páginas do arquivo.
+ARQUIVO_PARTE_ARROW = "parte-0.arrow"
+ARQUIVO_INDICE_MUNICIPIOS = "indice-municipios.arrow"
+ARQUIVO_HISTOGRAMAS_NOTAS = "histogramas-notas.arrow"
+
+# Limite de objetos por versão mantidos pelos caches de recurso: duas versões de cada edição
+# (a atual e a anterior, durante uma regravação do ETL). As versões antigas deixam de ser
+# usadas e saem primeiro, o que fecha os mapas de memória dos arquivos substituídos.
+EDICOES_EM_CACHE = 3
+VERSOES_POR_EDICAO = 2
+ARQUIVOS_MAPEADOS_POR_EDICAO = 5
+MAX_VERSOES_CACHE = EDICOES_EM_CACHE * VERSOES_POR_EDICAO
+
+# Dimensões do cubo oferecidas como filtro na barra lateral, com o rótulo do widget.
+DIMENSOES_FILTRO = {
+    'Desc_Regiao_Curso': "Região",
+    'Desc_UF_Curso': "UF",
+    'Desc_Genero': "Gênero",
+    'Desc_Raca': "Raça",
+    'Faixa_Idade': "Faixa etária",
+    'NOME_CURSO': "Curso",
+    'Presenca': "Presença",
+}
+
+
+def anos_disponiveis(diretorio=DIRETORIO_CUBO):
+    
+    # As edições são as próprias pastas do dataset; nada precisa ser lido.
+    if not os.path.isdir(diretorio):
+        return []
+    
+    return sorted((int(nome.split('=')[1]) for nome in os.listdir(diretorio) if nome.startswith('NU_ANO=')), reverse=True)
+
+
+def seletor_edicao(diretorio=DIRETORIO_CUBO):
+    
+    return st.sidebar.selectbox("Edição do ENADE", anos_disponiveis(diretorio))
+
+
+def ler_edicao(diretorio, ano, colunas=None):
+    
+    # O filtro de edição descarta as pastas das outras edições antes de qualquer leitura;
+    # a região volta como uint8, o mesmo tipo que tinha antes de virar pasta.
+    return pd.read_parquet(diretorio, columns=colunas, filters=[('NU_ANO', '==', ano)], partitioning=PARTICOES_DADOS_GERAIS)
+
+
+def versao_edicao(diretorio, ano, arquivo=ARQUIVO_PARTE_ARROW):
+    
+    # O ETL troca os arquivos inteiros (os.replace), então tamanho e data de modificação
+    # identificam a versão dos dados. Ela entra na chave de todos os caches que leem a
+    # edição: depois de um novo ETL, a página remapeia o arquivo e refaz os cálculos.
+    info = os.stat(os.path.join(diretorio, f"NU_ANO={ano}", arquivo))
+    return info.st_size, info.st_mtime_ns
+
+
+@st.cache_resource(max_entries=MAX_VERSOES_CACHE * ARQUIVOS_MAPEADOS_POR_EDICAO)
+def tabela_edicao(diretorio, ano, versao, arquivo=ARQUIVO_PARTE_ARROW):
+    
+    # Um único objeto por processo e versão dos dados, compartilhado por todas as sessões
+    # (cache_resource não copia o valor). Os buffers apontam para o arquivo mapeado, não
+    # para o heap; os arquivos anexos à partição (índice, histogramas) são trocados junto
+    # com ela e usam a mesma versão.
+    caminho = os.path.join(diretorio, f"NU_ANO={ano}", arquivo)
+    return pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+
+
+def quadro_edicao(diretorio, ano, versao, colunas=None, linhas=None):
+    
+    # Colunas numéricas sem nulos viram DataFrame sem cópia; o resultado é somente
+    # leitura e as colunas derivadas já vêm prontas do ETL, então as páginas não o alteram.
+    tabela = tabela_edicao(diretorio, ano, versao)
+    if colunas is not None:
+        tabela = tabela.select(list(colunas))
+    if linhas is not None:
+        tabela = tabela.take(linhas)
+    
+    return tabela.to_pandas(split_blocks=True)
+
+
+@st.cache_resource(max_entries=MAX_VERSOES_CACHE)
+def indice_municipios(ano, versao):
+    
+    # CO_MUNIC_CURSO -> (UF_SIGLA, inicio, linhas) das notas ordenadas por município.
+    return tabela_edicao(DIRETORIO_NOTAS_MUNICIPIOS, ano, versao, ARQUIVO_INDICE_MUNICIPIOS).to_pandas().set_index('CO_MUNIC_CURSO')
+
+
+def notas_municipio(ano, versao, municipio, colunas=None):
+    
+    # Fatiar a tabela mapeada não copia nada; só as linhas do município são convertidas.
+    inicio, linhas = indice_municipios(ano, versao).loc[municipio, ['inicio', 'linhas']]
+    tabela = tabela_edicao(DIRETORIO_NOTAS_MUNICIPIOS, ano, versao).slice(int(inicio), int(linhas))
+    if colunas is not None:
+        tabela = tabela.select(list(colunas))
+    
+    return tabela.to_pandas(split_blocks=True)
+
+
+def histogramas_municipio(ano, versao, municipio):
+    
+    # Histogramas de nota do município, de cada IES e de cada curso nele (coluna NIVEL),
+    # e a matriz de contagens (uma linha por histograma, uma coluna por faixa de 1 ponto).
+    inicio, linhas = indice_municipios(ano, versao).loc[municipio, ['inicio_histogramas', 'linhas_histogramas']]
+    tabela = tabela_edicao(DIRETORIO_NOTAS_MUNICIPIOS, ano, versao, ARQUIVO_HISTOGRAMAS_NOTAS).slice(int(inicio), int(linhas))
+    contagens = tabela.column('contagens').combine_chunks().flatten().to_numpy().reshape(len(tabela), -1)
+    
+    return tabela.drop_columns(['contagens']).to_pandas(split_blocks=True), contagens
+
+
+def estatisticas_histograma(histograma):
+    
+    # Média e desvio padrão amostral a partir das somas; a mediana já vem do ETL.
+    qtd = histograma['qtd']
+    media = histograma['soma_nota'] / qtd
+    variancia = max(histograma['soma_nota_quadrado'] - qtd * media ** 2, 0) / (qtd - 1) if qtd > 1 else float('nan')
+    
+    return media, histograma['mediana'], variancia ** 0.5
+
+
+@st.cache_resource(max_entries=MAX_VERSOES_CACHE)
+def bitmaps_cubo(ano, versao):
+    
+    # Para cada dimensão filtrável, um vetor de bits empacotado (1 bit por linha do cubo)
+    # por categoria. Montado uma vez por versão da edição e compartilhado entre as sessões.
+    cubo = quadro_edicao(DIRETORIO_CUBO, ano, versao, list(DIMENSOES_FILTRO))
+    bitmaps = {}
+    for dimensao in DIMENSOES_FILTRO:
+        codigos = cubo[dimensao].cat.codes.to_numpy()
+        bitmaps[dimensao] = {}
+        for codigo, categoria in enumerate(cubo[dimensao].cat.categories):
+            presentes = codigos == codigo
+            if presentes.any():
+                bitmaps[dimensao][categoria] = np.packbits(presentes)
+    
+    return bitmaps, len(cubo)
+
+
+def linhas_filtradas(ano, versao, filtros):
+    
+    # Categorias da mesma dimensão se somam (OU); dimensões diferentes se cruzam (E).
+    # Nenhum filtro ativo devolve None, que significa o cubo inteiro. Uma categoria que
+    # não existe na edição (selecionada em outra edição) não seleciona nenhuma linha.
+    bitmaps, total_linhas = bitmaps_cubo(ano, versao)
+    vazio = np.zeros((total_linhas + 7) // 8, dtype=np.uint8)
+    mascara = None
+    for dimensao, categorias in filtros:
+        bits = np.bitwise_or.reduce([bitmaps[dimensao].get(categoria, vazio) for categoria in categorias])
+        mascara = bits if mascara is None else mascara & bits
+    
+    if mascara is None:
+        return None
+    
+    return np.flatnonzero(np.unpackbits(mascara, count=total_linhas))
+
+
+def filtros_sidebar(ano, versao, dimensoes=DIMENSOES_FILTRO):
+    
+    # Devolve os filtros ativos como tupla de (dimensão, categorias), que é o formato
+    # aceito (e usado como chave de cache) por load_cubo.
+    bitmaps, _ = bitmaps_cubo(ano, versao)
+    filtros = []
+    with st.sidebar.expander("Filtros", expanded=False):
+        for dimensao in dimensoes:
+            selecao = st.multiselect(DIMENSOES_FILTRO[dimensao], list(bitmaps[dimensao]), key=f"filtro_{dimensao}")
+            if selecao:
+                filtros.append((dimensao, tuple(selecao)))
+    
+    return tuple(filtros)
+
+
+@st.cache_data
+def load_cubo(ano, versao, dimensoes=(), medidas=('qtd',), filtros=()):
+    
+    # Projeta do cubo mapeado só as colunas pedidas (e, com filtros, só as linhas
+    # selecionadas pelos bitmaps) e já devolve o recorte somado: cada gráfico guarda em
+    # cache apenas as poucas linhas que exibe.
+    cubo = quadro_edicao(DIRETORIO_CUBO, ano, versao, list(dimensoes) + list(medidas), linhas_filtradas(ano, versao, filtros))
+    if not dimensoes:
+        return cubo[list(medidas)].sum().to_frame().T
+    
+    return agregar_cubo(cubo, dimensoes, medidas)
+
+
+def agregar_cubo(cubo, dimensoes, medidas=('qtd',)):
+    # Qualquer recorte das páginas é uma soma das medidas do cubo pelas dimensões pedidas.
+    return cubo.groupby(list(dimensoes), observed=True)[list(medidas)].sum().reset_index()
+
+
+def media_cubo(cubo, soma, quantidade):
+    total = cubo[quantidade].sum()
+    return cubo[soma].sum() / total if total else float('nan')
+
+
+@st.cache_resource
+def load_geometrias_uf():
+    # Gerado uma vez por geometrias.py; o painel nunca busca geometrias na rede. Sem o
+    # arquivo, figura_mapa_uf desenha a grade de UFs.
+    if not os.path.exists(ARQUIVO_GEOMETRIAS_UF):
+        return None
+    
+    with open(ARQUIVO_GEOMETRIAS_UF, encoding='utf-8') as arquivo:
+        return json.load(arquivo)['niveis']
+
+
+def geometria_uf(tamanho_px):
+    
+    # Escolhe o nível de simplificação pelo tamanho do mapa renderizado.
+    niveis = load_geometrias_uf()
+    if niveis is None:
+        return None
+    
+    return niveis[nivel_para_tamanho(tamanho_px)]
@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from streamlit.logger import set_log_level
+
+# Fora do 'streamlit run' os caches do painel avisam, ao decorar cada função e a cada
+# chamada, que não há sessão; por isso o nível de log é ajustado antes das importações.
+set_log_level('error')
+
+import acesso_dados
+import figuras
+import tratamento_dados
+from instrumentacao import AmostradorRSS
+from mapeamentos import CO_MUNIC_JUIZ_DE_FORA
+from microdados_sinteticos import gerar_idh_sintetico, gerar_microdados_sinteticos
+
+ESCALAS_PADRAO = [100_000, 1_000_000]
+REPETICOES_PADRAO = 3
+TOLERANCIA_PADRAO = 0.2
+
+# Combinação de filtros da barra lateral usada para medir o caminho com bitmaps.
+FILTROS_BENCHMARK = (
+    ('Desc_Regiao_Curso', ('Sudeste', 'Sul')),
+    ('Desc_Genero', ('Feminino',)),
+    ('Faixa_Idade', ('21-25', '26-30')),
+)
+
+
+def medir(funcao, repeticoes=REPETICOES_PADRAO):
+    
+    # Tempo nas execuções normais (mínimo e mediana) e memória numa execução à parte
+    # com tracemalloc, que deixa o código mais lento e distorceria os tempos.
+    tempos = []
+    with AmostradorRSS() as amostrador, contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+    
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcao()
+    _, pico_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'segundos_min': round(min(tempos), 4),
+        'segundos_mediana': round(statistics.median(tempos), 4),
+        'pico_rss_mb': amostrador.pico_mb,
+        'pico_python_mb': round(pico_python / 2**20, 1),
+    }
+
+
+def _limpar_caches_painel():
+    
+    # Cada medição das páginas parte do cache vazio, como a primeira sessão após o deploy.
+    for funcao in (acesso_dados.tabela_edicao, acesso_dados.load_cubo, acesso_dados.bitmaps_cubo, acesso_dados.indice_municipios, figuras.densidade_notas_curso, figuras.ranking_cursos):
+        funcao.clear()
+
+
+def _montar_perfil(ano, filtros=()):
+    
+    # Os mesmos dados e figuras que pages/Perfil.py monta ao abrir, na mesma ordem.
+    _limpar_caches_painel()
+    versao = acesso_dados.versao_edicao(acesso_dados.DIRETORIO_CUBO, ano)
+    acesso_dados.load_cubo(ano, versao, medidas=('qtd', 'qtd_idade', 'soma_idade'), filtros=filtros)
+    acesso_dados.load_cubo(ano, versao, ('Desc_Genero',), filtros=filtros)
+    figuras.png_waffle_raca(figuras.distribuicao_raca(ano, versao, filtros))
+    figuras.figura_genero_regiao(ano, versao, filtros)
+    figuras.figura_genero_curso(ano, versao, filtros)
+
+
+def _montar_geografia(ano, filtros=()):
+    
+    _limpar_caches_painel()
+    versao = acesso_dados.versao_edicao(acesso_dados.DIRETORIO_CUBO, ano)
+    acesso_dados.load_cubo(ano, versao, medidas=('qtd', 'qtd_presentes', 'qtd_idade', 'soma_idade'), filtros=filtros)
+    figuras.figura_inscritos_regiao(figuras.contagem_cubo(ano, versao, 'Desc_Regiao_Curso', 'Regiao', filtros))
+    figuras.contagem_cubo(ano, versao, 'Desc_UF_Curso', 'UF', filtros)
+    figuras.figura_mapa_uf(figuras.contagem_cubo(ano, versao, 'UF_SIGLA', 'UF', filtros), acesso_dados.geometria_uf(figuras.ALTURA_MAPA))
+    df_analise, _ = figuras.regressao_idh(figuras.load_idh_notes_data(ano, acesso_dados.versao_edicao(acesso_dados.DIRETORIO_IDH_NOTAS, ano)))
+    figuras.figura_regressao_idh(df_analise, ano)
+
+
+def _montar_municipio(ano):
+    
+    # Página JF: agrupamento por tipo de IES, ranking por bootstrap, histograma da cidade
+    # e densidade (ou pontos) por curso da UFJF.
+    _limpar_caches_painel()
+    versao = acesso_dados.versao_edicao(acesso_dados.DIRETORIO_NOTAS_MUNICIPIOS, ano)
+    municipios = acesso_dados.indice_municipios(ano, versao).index
+    municipio = CO_MUNIC_JUIZ_DE_FORA if CO_MUNIC_JUIZ_DE_FORA in municipios else municipios[0]
+    df = figuras.load_data_jf(ano, versao, municipio)
+    figuras.figura_media_tipo_ies(df)
+    figuras.figura_top_cursos(ano, versao, municipio)
+    histogramas, contagens = acesso_dados.histogramas_municipio(ano, versao, municipio)
+    figuras.figura_histograma_notas(histogramas.iloc[0], contagens[0], str(municipio))
+    df_ufjf = df[df['CATEGORIA_COMPARACAO'] == 'UFJF']
+    if len(df_ufjf) > 0:
+        figuras.figura_ranking_ufjf(ano, versao, municipio)
+        figuras.figura_notas_cursos_ufjf(df_ufjf, ano, versao, municipio)
+
+
+def etapas_benchmark(ano, chunksize=None):
+    
+    # Etapas do ETL na ordem do pipeline; cada uma reaproveita a saída da anterior
+    # guardada em 'estado', para que só o trabalho da própria etapa seja medido.
+    estado = {}
+    caminho = tratamento_dados.caminho_edicao
+    
+    def carregar():
+        estado['microdados'] = tratamento_dados.carregar_microdados()
+    
+    def dados_gerais():
+        estado['df_geral'] = tratamento_dados.tratar_dados_gerais(estado['microdados'], caminho=caminho(tratamento_dados.DIRETORIO_SAIDA_DADOS_GERAIS, ano))
+    
+    def idh():
+        estado['df_idh'] = tratamento_dados.tratar_dados_idh()
+    
+    def idh_notas():
+        tratamento_dados.relacionar_idh_estados_nota(estado['microdados'], estado['df_idh'], caminho=caminho(tratamento_dados.DIRETORIO_SAIDA_IDH_NOTAS, ano))
+    
+    def notas_municipios():
+        tratamento_dados.obter_notas_municipios(estado['microdados'], caminho=caminho(tratamento_dados.DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ano))
+    
+    def cubo():
+        tratamento_dados.gerar_cubo_estudantes(estado['df_geral'], caminho=caminho(tratamento_dados.DIRETORIO_SAIDA_CUBO, ano))
+    
+    etapas = [
+        ('etl:carregar_microdados', carregar),
+        ('etl:dados_gerais_estudantes', dados_gerais),
+        ('etl:idh', idh),
+        ('etl:idh_notas_uf', idh_notas),
+        ('etl:notas_municipios', notas_municipios),
+        ('etl:cubo_estudantes', cubo),
+    ]
+    if chunksize:
+        etapas.append(('etl:processar_em_blocos', lambda: tratamento_dados.processar_em_blocos(chunksize)))
+    
+    etapas += [
+        ('pagina:Perfil', lambda: _montar_perfil(ano)),
+        ('pagina:Geografia', lambda: _montar_geografia(ano)),
+        ('pagina:Perfil (filtros)', lambda: _montar_perfil(ano, FILTROS_BENCHMARK)),
+        ('pagina:bitmaps_cubo', lambda: (_limpar_caches_painel(), acesso_dados.bitmaps_cubo(ano, acesso_dados.versao_edicao(acesso_dados.DIRETORIO_CUBO, ano)))),
+        ('pagina:JF', lambda: _montar_municipio(ano)),
+    ]
+    
+    return etapas
+
+
+def executar_escala(linhas, diretorio, repeticoes=REPETICOES_PADRAO, chunksize=None, semente=0):
+    
+    pasta = os.path.join(diretorio, f"linhas_{linhas}")
+    ano = tratamento_dados.ANO_PADRAO
+    
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        gerar_microdados_sinteticos(linhas, pasta, ano, semente)
+        gerar_idh_sintetico(pasta, semente)
+    print(f"[{linhas} linhas] microdados sintéticos gerados em {time.perf_counter() - inicio:.1f}s")
+    
+    # O ETL e o painel usam caminhos relativos (data/...), então as etapas rodam a
+    # partir da pasta de trabalho da escala.
+    diretorio_original = os.getcwd()
+    os.chdir(pasta)
+    try:
+        resultados = {}
+        for nome, funcao in etapas_benchmark(ano, chunksize):
+            resultados[nome] = medir(funcao, repeticoes)
+            # Como no relatório do ETL, a vazão das etapas é medida sobre os estudantes
+            # sintéticos; o IDH não depende deles e fica sem linhas/s.
+            if nome.startswith('etl:') and nome != 'etl:idh':
+                resultados[nome]['linhas_por_segundo'] = round(linhas / resultados[nome]['segundos_min']) if resultados[nome]['segundos_min'] else None
+            print(f"[{linhas} linhas] {nome:<32} {resultados[nome]['segundos_min']:9.3f}s  rss +{resultados[nome]['pico_rss_mb']} MB  python {resultados[nome]['pico_python_mb']} MB")
+    finally:
+        os.chdir(diretorio_original)
+    
+    return {'linhas': linhas, 'etapas': resultados}
+
+
+def ambiente():
+    
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'pyarrow': pa.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def comparar(resultado, base, tolerancia=TOLERANCIA_PADRAO):
+    
+    # Razão entre o tempo mínimo atual e o da base para cada (escala, etapa) presente
+    # nos dois arquivos; devolve as que ficaram mais lentas que a tolerância.
+    base_por_escala = {execucao['linhas']: execucao['etapas'] for execucao in base['execucoes']}
+    regressoes = []
+    for execucao in resultado['execucoes']:
+        etapas_base = base_por_escala.get(execucao['linhas'], {})
+        for nome, medida in execucao['etapas'].items():
+            if nome not in etapas_base or not etapas_base[nome]['segundos_min']:
+                continue
+            razao = medida['segundos_min'] / etapas_base[nome]['segundos_min']
+            marcador = "  <- regressão" if razao > 1 + tolerancia else ""
+            print(f"[{execucao['linhas']} linhas] {nome:<32} {razao:6.2f}x{marcador}")
+            if marcador:
+                regressoes.append((execucao['linhas'], nome, razao))
+    
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede tempo e memória das etapas do ETL e das consultas das páginas sobre microdados sintéticos.")
+    parser.add_argument('--linhas', nargs='+', type=int, default=ESCALAS_PADRAO, help="Escalas (número de estudantes) a medir, ex.: 100000 1000000 10000000.")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO, help="Execuções cronometradas por etapa.")
+    parser.add_argument('--chunksize', type=int, default=None, help="Também mede o modo em blocos com N linhas por bloco.")
+    parser.add_argument('--diretorio', default=None, help="Pasta de trabalho para os dados gerados. Padrão: pasta temporária.")
+    parser.add_argument('--semente', type=int, default=0, help="Semente do gerador de microdados.")
+    parser.add_argument('--saida', default='benchmark.json', help="Arquivo JSON com os resultados.")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior usado como base.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="Aumento relativo de tempo aceito antes de acusar regressão.")
+    args = parser.parse_args()
+    
+    diretorio = args.diretorio or tempfile.mkdtemp(prefix='benchmark_enade_')
+    resultado = {
+        'ambiente': ambiente(),
+        'repeticoes': args.repeticoes,
+        'execucoes': [executar_escala(linhas, diretorio, args.repeticoes, args.chunksize, args.semente) for linhas in args.linhas],
+    }
+    
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultados do benchmark gravados com sucesso ({args.saida}).")
+    
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            sys.exit(1)
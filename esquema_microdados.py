@@ -0,0 +1,103 @@
+from collections import namedtuple
+import re
+import pandas as pd
+import pyarrow as pa
+
+# Tipo de cada coluna dos microdados. 'tipo' segue a nomenclatura do pandas; os inteiros
+# são sempre anuláveis (UIntN) e a largura foi escolhida pelo maior código possível.
+# 'decimal' é o separador decimal usado pelo INEP nas colunas numéricas fracionárias.
+Coluna = namedtuple('Coluna', ['tipo', 'decimal'], defaults=[None])
+
+ESQUEMA_MICRODADOS = {
+    'arq1': {
+        'NU_ANO': Coluna('UInt16'),
+        'CO_IES': Coluna('UInt32'),
+        'CO_CATEGAD': Coluna('UInt16'),
+        'CO_ORGACAD': Coluna('UInt16'),
+        'CO_GRUPO': Coluna('UInt16'),
+        'CO_CURSO': Coluna('UInt32'),
+        'CO_MODALIDADE': Coluna('UInt8'),
+        'CO_MUNIC_CURSO': Coluna('UInt32'),
+        'CO_UF_CURSO': Coluna('UInt8'),
+        'CO_REGIAO_CURSO': Coluna('UInt8'),
+    },
+    'arq3': {
+        'NU_ANO': Coluna('UInt16'),
+        'CO_CURSO': Coluna('UInt32'),
+        'TP_PRES': Coluna('UInt16'),
+        'TP_PR_GER': Coluna('UInt16'),
+        'NT_GER': Coluna('float32', decimal=','),
+        'NT_FG': Coluna('float32', decimal=','),
+        'NT_CE': Coluna('float32', decimal=','),
+    },
+    'arq5': {
+        'NU_ANO': Coluna('UInt16'),
+        'CO_CURSO': Coluna('UInt32'),
+        'TP_SEXO': Coluna('str'),
+    },
+    'arq6': {
+        'NU_ANO': Coluna('UInt16'),
+        'CO_CURSO': Coluna('UInt32'),
+        'NU_IDADE': Coluna('UInt8'),
+    },
+    'arq8': {
+        'NU_ANO': Coluna('UInt16'),
+        'CO_CURSO': Coluna('UInt32'),
+        'QE_I02': Coluna('str'),
+    },
+}
+
+TIPOS_ARROW = {
+    'UInt8': pa.uint8(),
+    'UInt16': pa.uint16(),
+    'UInt32': pa.uint32(),
+    'float32': pa.float32(),
+    'str': pa.string(),
+}
+
+# Usado na conversão Arrow -> pandas para que inteiros com nulos não virem float64.
+TIPOS_PANDAS_DE_ARROW = {
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+}
+
+
+def identificar_arquivo(caminho):
+    
+    encontrado = re.search(r'(arq\d+)\.txt$', str(caminho))
+    if encontrado is None or encontrado.group(1) not in ESQUEMA_MICRODADOS:
+        raise KeyError(f"Arquivo sem esquema registrado: {caminho}")
+    
+    return encontrado.group(1)
+
+
+def colunas_do_esquema(arquivo, colunas):
+    
+    esquema = ESQUEMA_MICRODADOS[identificar_arquivo(arquivo)]
+    faltantes = [col for col in colunas if col not in esquema]
+    if faltantes:
+        raise KeyError(f"Colunas sem tipo registrado em {arquivo}: {', '.join(faltantes)}")
+    
+    return {col: esquema[col] for col in colunas}
+
+
+def tipos_pandas(arquivo, colunas):
+    
+    return {col: coluna.tipo for col, coluna in colunas_do_esquema(arquivo, colunas).items()}
+
+
+def tipos_arrow(arquivo, colunas):
+    
+    return {col: TIPOS_ARROW[coluna.tipo] for col, coluna in colunas_do_esquema(arquivo, colunas).items()}
+
+
+def separador_decimal(arquivo, colunas):
+    
+    # pandas e Arrow aceitam um único separador por leitura, então as colunas
+    # lidas juntas precisam compartilhar a mesma convenção.
+    separadores = {coluna.decimal for coluna in colunas_do_esquema(arquivo, colunas).values() if coluna.decimal}
+    if len(separadores) > 1:
+        raise ValueError(f"Colunas de {arquivo} com separadores decimais diferentes: {separadores}")
+    
+    return separadores.pop() if separadores else '.'
@@ -0,0 +1,550 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from io import BytesIO
+from acesso_dados import DIRETORIO_IDH_NOTAS, estatisticas_histograma, load_cubo, notas_municipio, quadro_edicao
+from reamostragem import ranking_bootstrap
+
+# Preparação dos dados e montagem dos gráficos das páginas. Fica fora de pages/ para que
+# a exportação estática (relatorio_estatico.py) use exatamente o mesmo código, sem Streamlit.
+
+ALTURA_MAPA = 400
+
+# Posição (linha, coluna) de cada UF no cartograma em grade usado quando não há
+# geometrias locais: todas as UFs com o mesmo tamanho, mantendo a vizinhança aproximada.
+GRADE_UF = {
+    'RR': (0, 1), 'AP': (0, 2),
+    'AM': (1, 1), 'PA': (1, 2), 'MA': (1, 3), 'CE': (1, 4), 'RN': (1, 5),
+    'AC': (2, 0), 'RO': (2, 1), 'TO': (2, 2), 'PI': (2, 3), 'PE': (2, 4), 'PB': (2, 5),
+    'MT': (3, 1), 'GO': (3, 2), 'DF': (3, 3), 'BA': (3, 4), 'AL': (3, 5),
+    'MS': (4, 1), 'SP': (4, 2), 'MG': (4, 3), 'ES': (4, 4), 'SE': (4, 5),
+    'PR': (5, 1), 'RJ': (5, 3),
+    'SC': (6, 1),
+    'RS': (7, 1),
+}
+
+COLUNAS_IDH_NOTAS = ['Territorialidades', 'qtd_notas', 'soma_nota', 'IDHM Educação 2021']
+
+CORES_GENERO = {'Feminino': '#E74C3C', 'Masculino': '#3498DB'}
+CORES_RACA = {
+    'Branca': '#468996', 'Parda': '#00B050', 'Preta': '#FF555E',
+    'Amarela': '#FFC000', 'Indígena': '#C65911'
+}
+
+# Colunas das notas por município usadas na página JF; NOME_CURSO e CATEGORIA_COMPARACAO
+# já vêm do ETL, e o DataFrame (somente leitura, sobre a tabela mapeada) não é alterado.
+COLUNAS_JF = ['CO_CURSO', 'NOME_CURSO', 'TIPO_IES', 'CATEGORIA_COMPARACAO', 'NT_GER']
+
+# Acima deste número de estudantes o gráfico por curso deixa de enviar um ponto por aluno
+# ao navegador e mostra a densidade de notas em faixas, com os quantis de cada curso; a
+# página JF permite ajustar o limite na barra lateral.
+LIMITE_PONTOS_INDIVIDUAIS = 3000
+LARGURA_FAIXA_NOTA = 2
+QUANTIS_CURSO = [5, 25, 50, 75, 95]
+
+# Rankings por curso: áreas com poucos alunos só entram no ranking da cidade a partir
+# deste mínimo, e a estabilidade é medida pela chance de ficar entre os primeiros.
+MINIMO_ALUNOS_RANKING = 10
+TOPO_RANKING_CIDADE = 10
+TOPO_RANKING_UFJF = 5
+
+# O histograma da cidade vem pronto do ETL em faixas de 1 ponto; cada barra junta 4 faixas.
+FAIXAS_POR_BARRA = 4
+
+
+def contagem_cubo(ano, versao, dimensao, rotulo, filtros=()):
+    
+    # Inscritos por categoria da dimensão, da maior para a menor, nas colunas (rotulo, Total).
+    dados = load_cubo(ano, versao, (dimensao,), filtros=filtros).sort_values('qtd', ascending=False)
+    dados.columns = [rotulo, 'Total']
+    
+    return dados
+
+
+def figura_inscritos_regiao(dados_regiao):
+    
+    fig_reg = px.bar(
+        dados_regiao,
+        x='Regiao', y='Total',
+        color='Regiao', text='Total',
+        color_discrete_sequence=px.colors.qualitative.Safe
+    )
+    fig_reg.update_traces(textposition='outside')
+    fig_reg.update_layout(
+        showlegend=False, xaxis_title="", yaxis_title="",
+        margin=dict(t=30, b=0), height=400,
+        title="Inscritos por Região"
+    )
+    
+    return fig_reg
+
+
+def figura_grade_uf(dados_mapa, altura=ALTURA_MAPA):
+    
+    # Uma célula por UF na posição de GRADE_UF; células sem UF ficam vazias (NaN).
+    linhas = max(linha for linha, _ in GRADE_UF.values()) + 1
+    colunas = max(coluna for _, coluna in GRADE_UF.values()) + 1
+    totais = np.full((linhas, colunas), np.nan)
+    siglas = np.full((linhas, colunas), '', dtype=object)
+    por_uf = dict(zip(dados_mapa['UF'].astype(str), dados_mapa['Total']))
+    for uf, (linha, coluna) in GRADE_UF.items():
+        totais[linha, coluna] = por_uf.get(uf, 0)
+        siglas[linha, coluna] = uf
+    
+    fig_mapa = go.Figure(go.Heatmap(
+        z=totais,
+        text=siglas,
+        texttemplate="%{text}",
+        colorscale="Blues",
+        xgap=3, ygap=3,
+        hoverongaps=False,
+        hovertemplate="<b>%{text}</b><br>Inscritos: %{z:,.0f}<extra></extra>",
+        colorbar=dict(title="Inscritos")
+    ))
+    fig_mapa.update_xaxes(visible=False, constrain='domain')
+    fig_mapa.update_yaxes(visible=False, autorange='reversed', scaleanchor='x')
+    fig_mapa.update_layout(
+        margin={"r":0,"t":0,"l":0,"b":0},
+        paper_bgcolor="white",
+        plot_bgcolor="white",
+        height=altura
+    )
+    
+    return fig_mapa
+
+
+def figura_mapa_uf(dados_mapa, geojson_brasil, altura=ALTURA_MAPA):
+    
+    # As geometrias vêm do arquivo versionado no repositório; a grade de UFs só aparece se
+    # ele tiver sido removido da instalação.
+    if geojson_brasil is None:
+        return figura_grade_uf(dados_mapa, altura)
+    
+    fig_mapa = px.choropleth(
+        dados_mapa,
+        geojson=geojson_brasil,
+        locations='UF',
+        featureidkey='id',
+        color='Total',
+        color_continuous_scale="Blues",
+        hover_name='UF',
+        hover_data={'UF': False, 'Total': True},
+        labels={'Total': 'Inscritos'}
+    )
+    fig_mapa.update_geos(fitbounds="locations", visible=False)
+    fig_mapa.update_layout(
+        margin={"r":0,"t":0,"l":0,"b":0},
+        paper_bgcolor="white",
+        plot_bgcolor="white",
+        height=altura
+    )
+    
+    return fig_mapa
+
+
+def load_idh_notes_data(ano, versao):
+    # Uma linha por UF com quantidade, soma e soma dos quadrados das notas (gerada pelo ETL),
+    # lida da tabela mapeada compartilhada entre as sessões.
+    return quadro_edicao(DIRETORIO_IDH_NOTAS, ano, versao, COLUNAS_IDH_NOTAS)
+
+
+def regressao_idh(df_regressao_raw):
+    
+    # Nota média por UF contra o IDHM Educação; devolve os dados da UF e o modelo ajustado.
+    df_analise = df_regressao_raw.dropna(subset=['Territorialidades']).assign(
+        NT_GER=lambda df: df['soma_nota'] / df['qtd_notas'],
+        Qtd_Alunos=lambda df: df['qtd_notas']
+    )
+    df_analise = df_analise.reset_index(drop=True)
+    
+    # statsmodels é importado só quando a regressão é exibida: é o pacote mais
+    # pesado da página e atrasaria a abertura de todas as sessões.
+    import statsmodels.api as sm
+    
+    X = df_analise['IDHM Educação 2021']
+    Y = df_analise['NT_GER']
+    X_const = sm.add_constant(X)
+    
+    return df_analise, sm.OLS(Y, X_const).fit()
+
+
+def figura_regressao_idh(df_analise, ano):
+    
+    fig_scatter = px.scatter(
+        df_analise,
+        x='IDHM Educação 2021',
+        y='NT_GER',
+        text='Territorialidades',
+        size='Qtd_Alunos',
+        trendline='ols',
+        title=f"Regressão linear: IDHM Educação estadual vs. nota geral média no ENADE {ano}",
+        labels={'IDHM 2021': 'IDH (2021)', 'NT_GER': 'Nota geral média (0-99)', 'Territorialidades': 'UF', 'Qtd_Alunos':'Alunos'},
+        hover_data=['Qtd_Alunos']
+    )
+    
+    fig_scatter.update_traces(
+        textposition='top center',
+        marker=dict(color="#087ac6", line=dict(width=1, color='white'))
+    )
+    
+    fig_scatter.update_layout(
+        height=500,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    
+    return fig_scatter
+
+
+def distribuicao_raca(ano, versao, filtros=()):
+    
+    raca_counts = contagem_cubo(ano, versao, 'Desc_Raca', 'Raça', filtros)
+    raca_counts['Porcentagem'] = (raca_counts['Total'] / raca_counts['Total'].sum()) * 100
+    
+    return raca_counts
+
+
+def png_waffle_raca(raca_counts):
+    
+    # A figura é criada direto pela classe Waffle, sem passar pelo pyplot, então nenhuma
+    # figura fica aberta depois que o PNG é gravado.
+    from pywaffle import Waffle
+    
+    data_waffle = dict(zip(raca_counts['Raça'], raca_counts['Porcentagem']))
+    colors_list = [CORES_RACA.get(r, '#999999') for r in data_waffle.keys()]
+    
+    fig_waffle = Waffle(
+        rows=5, columns=20,
+        values=data_waffle, colors=colors_list,
+        rounding_rule='nearest',
+        figsize=(12, 5),
+        block_arranging_style='snake'
+    )
+    fig_waffle.axes[0].get_legend().remove()
+    
+    buffer = BytesIO()
+    fig_waffle.savefig(buffer, format='png', bbox_inches='tight')
+    
+    return buffer.getvalue()
+
+
+def figura_genero_regiao(ano, versao, filtros=()):
+    
+    df_regiao_sexo = load_cubo(ano, versao, ('Desc_Regiao_Curso', 'Desc_Genero'), filtros=filtros).rename(columns={'qtd': 'Contagem'})
+    
+    fig_regiao = px.bar(
+        df_regiao_sexo,
+        x="Desc_Regiao_Curso",
+        y="Contagem",
+        color="Desc_Genero",
+        barmode="group",
+        title="Comparativo Regional: Homens vs. Mulheres",
+        color_discrete_map=CORES_GENERO,
+        text_auto='.2s'
+    )
+    fig_regiao.update_layout(height=500, xaxis_title="Região", yaxis_title="Número de Estudantes")
+    
+    return fig_regiao
+
+
+def figura_genero_curso(ano, versao, filtros=()):
+    
+    df_curso_sexo = load_cubo(ano, versao, ('NOME_CURSO', 'Desc_Genero'), filtros=filtros).rename(columns={'qtd': 'Contagem'})
+    
+    df_total_curso = df_curso_sexo.groupby('NOME_CURSO', observed=True)['Contagem'].transform('sum')
+    df_curso_sexo['Percentual'] = (df_curso_sexo['Contagem'] / df_total_curso) * 100
+    
+    cursos_relevantes = load_cubo(ano, versao, ('NOME_CURSO',), filtros=filtros)
+    cursos_relevantes = cursos_relevantes.loc[cursos_relevantes['qtd'] > 1, 'NOME_CURSO'].tolist()
+    
+    df_gap = df_curso_sexo[df_curso_sexo['NOME_CURSO'].isin(cursos_relevantes)].copy()
+    
+    pivo = df_gap.pivot(index='NOME_CURSO', columns='Desc_Genero', values='Percentual').fillna(0)
+    
+    if 'Feminino' in pivo.columns:
+        ordem_cursos = pivo.sort_values('Feminino', ascending=True).index.tolist()
+    else:
+        ordem_cursos = pivo.index.tolist()
+    
+    fig_gap = px.bar(
+        df_gap,
+        y="NOME_CURSO",
+        x="Percentual",
+        color="Desc_Genero",
+        orientation='h',
+        title="Divisão de Gênero por Curso (Ordenado por Presença Feminina)",
+        color_discrete_map=CORES_GENERO,
+        text_auto='.1f',
+        category_orders={"NOME_CURSO": ordem_cursos}
+    )
+    
+    fig_gap.update_layout(
+        height=800,
+        xaxis_title="% do Curso",
+        yaxis_title="",
+        barmode='relative',
+        xaxis_range=[0, 100]
+    )
+    
+    fig_gap.add_vline(x=50, line_dash="dash", line_color="gray", annotation_text="Equilíbrio (50%)")
+    
+    return fig_gap
+
+
+def load_data_jf(ano, versao, municipio):
+    # Lê só a faixa de linhas do município, localizada pelo índice gerado no ETL.
+    return notas_municipio(ano, versao, municipio, COLUNAS_JF)
+
+
+@st.cache_data
+def densidade_notas_curso(ano, versao, municipio, categoria='UFJF', largura=LARGURA_FAIXA_NOTA):
+    
+    # Contagem de alunos por (curso, faixa de nota) e quantis por curso, calculados no
+    # servidor: o tamanho do gráfico depende de cursos x faixas, não do número de alunos.
+    df = load_data_jf(ano, versao, municipio)
+    df = df[df['CATEGORIA_COMPARACAO'] == categoria]
+    cursos = df['NOME_CURSO'].cat.remove_unused_categories()
+    codigos = cursos.cat.codes.to_numpy().astype('int64')
+    notas = df['NT_GER'].to_numpy(dtype='float64')
+    
+    n_faixas = int(np.ceil(100 / largura))
+    faixas = np.clip((notas // largura).astype('int64'), 0, n_faixas - 1)
+    contagem = np.bincount(codigos * n_faixas + faixas, minlength=len(cursos.cat.categories) * n_faixas)
+    contagem = contagem.reshape(len(cursos.cat.categories), n_faixas)
+    
+    ordem = np.argsort(codigos, kind='stable')
+    grupos = np.split(notas[ordem], np.cumsum(contagem.sum(axis=1))[:-1])
+    quantis = pd.DataFrame([np.percentile(grupo, QUANTIS_CURSO) for grupo in grupos], columns=[f"p{q}" for q in QUANTIS_CURSO])
+    quantis['NOME_CURSO'] = list(cursos.cat.categories)
+    
+    # Cursos em ordem decrescente de mediana, como no ranking; faixas nas linhas.
+    posicoes = quantis['p50'].to_numpy().argsort(kind='stable')[::-1]
+    centros = (np.arange(n_faixas) + 0.5) * largura
+    
+    return quantis.iloc[posicoes].reset_index(drop=True), contagem[posicoes].T, centros
+
+
+@st.cache_data
+def ranking_cursos(ano, versao, municipio, categoria=None, minimo_alunos=1, topo=TOPO_RANKING_CIDADE):
+    
+    # A versão dos arquivos do ETL está na chave e também seleciona a tabela mapeada lida
+    # por load_data_jf: dados regravados refazem o bootstrap sobre os dados novos.
+    df = load_data_jf(ano, versao, municipio)
+    if categoria is not None:
+        df = df[df['CATEGORIA_COMPARACAO'] == categoria]
+    alunos = df['NOME_CURSO'].value_counts()
+    df = df[df['NOME_CURSO'].isin(alunos.index[alunos >= minimo_alunos])]
+    ranking = ranking_bootstrap(df['NT_GER'].to_numpy(), df['NOME_CURSO'].astype(str).to_numpy(), topo=topo)
+    ranking['erro_superior'] = ranking['ic_superior'] - ranking['media']
+    ranking['erro_inferior'] = ranking['media'] - ranking['ic_inferior']
+    ranking['faixa_posicao'] = ranking['posicao_melhor'].astype(str) + "º a " + ranking['posicao_pior'].astype(str) + "º"
+    
+    return ranking.rename(columns={'grupo': 'NOME_CURSO', 'media': 'mean', 'qtd': 'count'})
+
+
+def figura_ranking(ranking, titulo, topo, **kwargs):
+    
+    # Barras da média com o intervalo de 95% do bootstrap; o hover mostra a estabilidade.
+    fig = px.bar(
+        ranking,
+        x='mean',
+        y='NOME_CURSO',
+        orientation='h',
+        text_auto='.1f',
+        title=titulo,
+        color='mean',
+        error_x='erro_superior',
+        error_x_minus='erro_inferior',
+        hover_data={'count': True, 'faixa_posicao': True, 'prob_topo': ':.0%', 'erro_superior': False, 'erro_inferior': False},
+        labels={
+            'mean': 'Nota média',
+            'NOME_CURSO': 'Curso',
+            'count': 'Alunos',
+            'faixa_posicao': 'Posição provável (95%)',
+            'prob_topo': f'Chance de estar no top {topo}',
+        },
+        **kwargs
+    )
+    fig.update_traces(error_x=dict(color='DarkSlateGrey', thickness=1))
+    
+    return fig
+
+
+def figura_densidade_cursos(quantis, contagem, centros, titulo):
+    
+    # Percentual de cada curso em cada faixa, para que cursos pequenos também apareçam.
+    percentual = contagem / contagem.sum(axis=0, keepdims=True) * 100
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=quantis['NOME_CURSO'],
+        y=centros,
+        z=np.where(contagem > 0, percentual, np.nan),
+        customdata=contagem,
+        colorscale='Blues',
+        colorbar=dict(title="% do curso"),
+        hovertemplate="%{x}<br>Nota: %{y:.0f}<br>%{customdata} alunos (%{z:.1f}% do curso)<extra></extra>",
+    ))
+    fig.add_trace(go.Box(
+        x=quantis['NOME_CURSO'],
+        lowerfence=quantis['p5'],
+        q1=quantis['p25'],
+        median=quantis['p50'],
+        q3=quantis['p75'],
+        upperfence=quantis['p95'],
+        fillcolor='rgba(0,0,0,0)',
+        line=dict(color='DarkSlateGrey', width=1.5),
+        name="Quantis (5%, 25%, 50%, 75%, 95%)",
+        hoverinfo='skip',
+    ))
+    fig.update_layout(title=titulo, showlegend=False)
+    
+    return fig
+
+
+def figura_media_tipo_ies(df):
+    
+    media_ies = df.groupby('TIPO_IES', observed=True)['NT_GER'].mean().round(2).reset_index()
+    
+    fig2 = px.bar(
+        media_ies,
+        x='NT_GER',
+        y='TIPO_IES',
+        orientation='h',
+        text_auto='.1f',
+        color='NT_GER',
+        title="Nota média por tipo de instituição",
+        labels={
+            'NT_GER': 'Nota Média',
+            'TIPO_IES': 'Tipo de IES'
+        }
+    )
+    
+    fig2.update_layout(
+        xaxis_title="Nota Média",
+        yaxis_title="",
+        yaxis={'categoryorder':'total ascending'},
+        showlegend=False
+    )
+    
+    return fig2
+
+
+def figura_top_cursos(ano, versao, municipio):
+    
+    stats_curso = ranking_cursos(ano, versao, municipio, minimo_alunos=MINIMO_ALUNOS_RANKING, topo=TOPO_RANKING_CIDADE)
+    top_cursos = stats_curso.head(TOPO_RANKING_CIDADE).sort_values('mean', ascending=True)
+    
+    fig3 = figura_ranking(top_cursos, "Top 10 áreas com melhor desempenho", TOPO_RANKING_CIDADE)
+    fig3.update_layout(
+        xaxis_title="Nota média geral",
+        yaxis_title="",
+        showlegend=False
+    )
+    
+    return fig3
+
+
+def figura_histograma_notas(histograma, contagens, cidade):
+    
+    # Só as contagens por faixa vão para o navegador, qualquer que seja o número de alunos.
+    media, mediana, _ = estatisticas_histograma(histograma)
+    barras = contagens.reshape(-1, FAIXAS_POR_BARRA).sum(axis=1)
+    df_barras = pd.DataFrame({
+        'Faixa de nota': (np.arange(len(barras)) + 0.5) * FAIXAS_POR_BARRA,
+        'Quantidade de alunos': barras,
+    })
+    
+    fig_hist = px.bar(
+        df_barras,
+        x="Faixa de nota",
+        y="Quantidade de alunos",
+        title=f"Distribuição de Notas em {cidade} (N={histograma['qtd']})",
+        opacity=0.7,
+        color_discrete_sequence=['skyblue']
+    )
+    fig_hist.update_traces(width=FAIXAS_POR_BARRA)
+    
+    fig_hist.add_vline(
+        x=media,
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Média: {media:.1f}",
+        annotation_position="top right"
+    )
+    
+    fig_hist.add_vline(
+        x=mediana,
+        line_dash="solid",
+        line_color="green",
+        annotation_text=f"Mediana: {mediana:.1f}",
+        annotation_position="top left"
+    )
+    
+    fig_hist.update_layout(
+        xaxis_title="Nota geral (0 a 99)",
+        yaxis_title="Frequência de alunos",
+        bargap=0.1,
+        showlegend=False
+    )
+    
+    return fig_hist
+
+
+def figura_ranking_ufjf(ano, versao, municipio):
+    
+    ranking_ufjf = ranking_cursos(ano, versao, municipio, categoria='UFJF', topo=TOPO_RANKING_UFJF)
+    ranking_ufjf = ranking_ufjf.sort_values('mean', ascending=True)
+    
+    fig_rank = figura_ranking(
+        ranking_ufjf,
+        f"Média Geral dos Cursos da UFJF (ENADE {ano})",
+        TOPO_RANKING_UFJF,
+        color_continuous_scale='Reds'
+    )
+    fig_rank.update_layout(xaxis_title="Nota Média", yaxis_title="", height=600)
+    
+    return fig_rank
+
+
+def figura_notas_cursos_ufjf(df_ufjf, ano, versao, municipio, limite=LIMITE_PONTOS_INDIVIDUAIS):
+    
+    # Um ponto por aluno até o limite; acima disso, densidade por faixas.
+    if len(df_ufjf) <= limite:
+        ordem_cursos = df_ufjf.groupby('NOME_CURSO', observed=True)['NT_GER'].median().sort_values(ascending=False).index
+    
+        fig_strip_ufjf = px.strip(
+            df_ufjf,
+            x="NOME_CURSO",
+            y="NT_GER",
+            color="NOME_CURSO",
+            stripmode="overlay",
+            title="Distribuição Individual de Notas por Curso (UFJF)",
+            hover_data=["NT_GER"],
+            category_orders={'NOME_CURSO': list(ordem_cursos)},
+            labels={
+                'NOME_CURSO': 'Curso do aluno',
+                'NT_GER': 'Nota do aluno'
+            }
+        )
+    
+        fig_strip_ufjf.update_traces(
+            marker=dict(size=5, opacity=0.7, line=dict(width=0.5, color='DarkSlateGrey')),
+            jitter=0.5
+        )
+    else:
+        fig_strip_ufjf = figura_densidade_cursos(
+            *densidade_notas_curso(ano, versao, municipio),
+            titulo="Distribuição de Notas por Curso (UFJF)"
+        )
+    
+    fig_strip_ufjf.update_layout(
+        xaxis_title="",
+        yaxis_title="Nota Geral",
+        showlegend=False,
+        height=600,
+        xaxis_tickangle=-45
+    )
+    
+    return fig_strip_ufjf
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+from urllib.request import urlopen
+import numpy as np
+from mapeamentos import CODIGO_UF_PARA_SIGLA
+
+# O arquivo versionado em data/processed foi gerado com --origem apontando para a malha
+# municipal do IBGE (1:2.500.000) dissolvida por UF, com a sigla em properties.sigla.
+URL_GEOJSON_ESTADOS = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+ARQUIVO_GEOMETRIAS_UF = "data/processed/geometrias_uf.json"
+
+# Tolerância (em graus) da simplificação Douglas-Peucker de cada nível, do mais
+# detalhado ao mais leve. 0.01° equivale a pouco mais de 1 km no território brasileiro.
+NIVEIS_SIMPLIFICACAO = {
+    'detalhado': 0.01,
+    'medio': 0.05,
+    'leve': 0.15,
+}
+
+# Menor dimensão renderizada (em pixels) a partir da qual cada nível compensa.
+TAMANHO_MINIMO_NIVEL = {
+    'detalhado': 900,
+    'medio': 350,
+    'leve': 0,
+}
+
+CASAS_DECIMAIS = 3
+
+
+def nivel_para_tamanho(tamanho_px):
+    
+    for nivel, minimo in TAMANHO_MINIMO_NIVEL.items():
+        if tamanho_px >= minimo:
+            return nivel
+    
+    return list(NIVEIS_SIMPLIFICACAO)[-1]
+
+
+def _simplificar_linha(pontos, tolerancia):
+    
+    # Douglas-Peucker iterativo: mantém o ponto mais distante do segmento entre os
+    # extremos enquanto essa distância passar da tolerância.
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[[0, -1]] = True
+    pilha = [(0, len(pontos) - 1)]
+    
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim - inicio < 2:
+            continue
+        a, b = pontos[inicio], pontos[fim]
+        meio = pontos[inicio + 1:fim]
+        segmento = b - a
+        comprimento = np.hypot(*segmento)
+        if comprimento == 0:
+            distancias = np.hypot(*(meio - a).T)
+        else:
+            distancias = np.abs(segmento[0] * (meio[:, 1] - a[1]) - segmento[1] * (meio[:, 0] - a[0])) / comprimento
+        maior = int(distancias.argmax())
+        if distancias[maior] > tolerancia:
+            indice = inicio + 1 + maior
+            manter[indice] = True
+            pilha += [(inicio, indice), (indice, fim)]
+    
+    return pontos[manter]
+
+
+def _simplificar_anel(anel, tolerancia):
+    
+    # O anel é fechado (primeiro ponto = último); divide-se no ponto mais distante do
+    # início para que os dois extremos de cada metade não coincidam.
+    pontos = np.asarray(anel, dtype='float64')
+    oposto = int(np.hypot(*(pontos - pontos[0]).T).argmax())
+    if oposto == 0:
+        return None
+    
+    simplificado = np.vstack([
+        _simplificar_linha(pontos[:oposto + 1], tolerancia)[:-1],
+        _simplificar_linha(pontos[oposto:], tolerancia),
+    ])
+    simplificado = np.round(simplificado, CASAS_DECIMAIS)
+    
+    # Anéis que colapsam (ilhas menores que a tolerância) são descartados.
+    if len(np.unique(simplificado[:-1], axis=0)) < 3:
+        return None
+    
+    return simplificado.tolist()
+
+
+def _simplificar_geometria(geometria, tolerancia):
+    
+    poligonos = geometria['coordinates'] if geometria['type'] == 'MultiPolygon' else [geometria['coordinates']]
+    
+    resultado = []
+    for poligono in poligonos:
+        exterior = _simplificar_anel(poligono[0], tolerancia)
+        if exterior is None:
+            continue
+        buracos = [anel for anel in (_simplificar_anel(buraco, tolerancia) for buraco in poligono[1:]) if anel is not None]
+        resultado.append([exterior] + buracos)
+    
+    # Toda UF mantém ao menos o maior polígono, mesmo que a tolerância o elimine.
+    if not resultado:
+        maior = max(poligonos, key=lambda poligono: len(poligono[0]))
+        resultado = [[np.round(maior[0], CASAS_DECIMAIS).tolist()]]
+    
+    return {'type': 'MultiPolygon', 'coordinates': resultado}
+
+
+def _ler_geojson(origem):
+    
+    if origem.startswith(('http://', 'https://')):
+        with urlopen(origem) as resposta:
+            return json.load(resposta)
+    
+    with open(origem, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def gerar_geometrias(origem=URL_GEOJSON_ESTADOS, caminho=ARQUIVO_GEOMETRIAS_UF):
+    
+    # Gera, uma única vez, o arquivo local versionado e usado pelo painel:
+    # um FeatureCollection por nível, com o 'id' de cada feature igual à sigla da UF.
+    fonte = _ler_geojson(origem)
+    siglas = set(CODIGO_UF_PARA_SIGLA.values())
+    
+    features = {feature['properties']['sigla']: feature['geometry'] for feature in fonte['features']}
+    faltantes = sorted(siglas - set(features))
+    if faltantes:
+        raise ValueError(f"GeoJSON de origem sem as UFs: {', '.join(faltantes)}")
+    
+    niveis = {}
+    for nivel, tolerancia in NIVEIS_SIMPLIFICACAO.items():
+        niveis[nivel] = {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'id': sigla, 'properties': {}, 'geometry': _simplificar_geometria(features[sigla], tolerancia)}
+                for sigla in sorted(siglas)
+            ],
+        }
+    
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'niveis': niveis}, arquivo, separators=(',', ':'))
+    
+    for nivel, colecao in niveis.items():
+        pontos = sum(len(anel) for feature in colecao['features'] for poligono in feature['geometry']['coordinates'] for anel in poligono)
+        print(f"  {nivel:<10} {pontos:>8} pontos")
+    print(f"Geometrias das UFs geradas com sucesso ({caminho}).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera as geometrias simplificadas das UFs usadas no mapa do painel.")
+    parser.add_argument(
+        '--origem', default=URL_GEOJSON_ESTADOS,
+        help="Caminho ou URL do GeoJSON dos estados, com a sigla da UF em properties.sigla."
+    )
+    args = parser.parse_args()
+    
+    gerar_geometrias(args.origem)
@@ -0,0 +1,130 @@
+import cProfile
+import os
+import re
+import threading
+import time
+
+INTERVALO_AMOSTRAGEM_RSS = 0.01
+
+
+def rss_atual():
+    
+    # Memória residente do processo em bytes; só disponível no Linux.
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def contadores_io():
+    
+    # Bytes lidos e escritos pelo processo (todas as threads) via chamadas de sistema;
+    # inclui o que veio do cache de páginas, ao contrário de read_bytes/write_bytes.
+    try:
+        with open('/proc/self/io') as arquivo:
+            campos = dict(linha.split(': ') for linha in arquivo.read().splitlines())
+        return int(campos['rchar']), int(campos['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+class AmostradorRSS:
+    
+    # Acompanha, numa thread, o pico de memória residente acima do valor de entrada.
+    # Pega o que tracemalloc não vê: buffers do Arrow e memória alocada fora do Python.
+    
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM_RSS):
+        self.intervalo = intervalo
+        self.inicial = None
+        self.pico = None
+        self.parar = threading.Event()
+    
+    def _amostrar(self):
+        while not self.parar.wait(self.intervalo):
+            self.pico = max(self.pico, rss_atual())
+    
+    def __enter__(self):
+        self.inicial = self.pico = rss_atual()
+        if self.inicial is not None:
+            self.thread = threading.Thread(target=self._amostrar, daemon=True)
+            self.thread.start()
+        return self
+    
+    def __exit__(self, tipo_erro, erro, rastro):
+        if self.inicial is not None:
+            self.parar.set()
+            self.thread.join()
+            self.pico = max(self.pico, rss_atual())
+        return False
+    
+    @property
+    def pico_mb(self):
+        return None if self.inicial is None else round((self.pico - self.inicial) / 2**20, 1)
+    
+    @property
+    def pico_absoluto_mb(self):
+        return None if self.pico is None else round(self.pico / 2**20, 1)
+
+
+def contar_linhas(valor):
+    
+    # Etapas devolvem DataFrames/tabelas ou, quando rodam no pool, só o número de linhas.
+    if isinstance(valor, bool) or valor is None:
+        return None
+    if isinstance(valor, int):
+        return valor
+    if hasattr(valor, 'shape'):
+        return int(valor.shape[0])
+    
+    return None
+
+
+def _diferenca(depois, antes):
+    return None if depois is None or antes is None else depois - antes
+
+
+def arquivo_perfil(diretorio, nome):
+    # Nomes de etapa têm ':' e '/', que não servem em nomes de arquivo.
+    return os.path.join(diretorio, re.sub(r'[^\w.-]+', '_', nome) + '.prof')
+
+
+def medir_etapa(nome, funcao, argumentos=(), diretorio_perfil=None):
+    
+    # Roda uma etapa no processo atual e devolve (resultado, medida). Com
+    # diretorio_perfil, grava também o perfil do cProfile da etapa (abre com pstats/snakeviz).
+    linhas_entrada = [contar_linhas(valor) for valor in argumentos]
+    lidos_antes, escritos_antes = contadores_io()
+    perfil = cProfile.Profile() if diretorio_perfil else None
+    
+    with AmostradorRSS() as amostrador:
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        if perfil is not None:
+            resultado = perfil.runcall(funcao, *argumentos)
+        else:
+            resultado = funcao(*argumentos)
+        segundos, segundos_cpu = time.perf_counter() - inicio, time.process_time() - inicio_cpu
+    
+    lidos, escritos = contadores_io()
+    if perfil is not None:
+        os.makedirs(diretorio_perfil, exist_ok=True)
+        perfil.dump_stats(arquivo_perfil(diretorio_perfil, nome))
+    
+    # As dependências de uma etapa descrevem os mesmos estudantes (arquivos arq* lado a
+    # lado, microdados + IDH), então a entrada é a maior delas, não a soma.
+    linhas_saida = contar_linhas(resultado)
+    linhas_entrada = max((linhas for linhas in linhas_entrada if linhas is not None), default=None)
+    linhas_processadas = linhas_entrada if linhas_entrada is not None else linhas_saida
+    
+    return resultado, {
+        'segundos': round(segundos, 4),
+        'segundos_cpu': round(segundos_cpu, 4),
+        'pico_rss_mb': amostrador.pico_absoluto_mb,
+        'aumento_rss_mb': amostrador.pico_mb,
+        'linhas_entrada': linhas_entrada,
+        'linhas_saida': linhas_saida,
+        'bytes_lidos': _diferenca(lidos, lidos_antes),
+        'bytes_escritos': _diferenca(escritos, escritos_antes),
+        'linhas_por_segundo': round(linhas_processadas / segundos) if linhas_processadas and segundos else None,
+        'pid': os.getpid(),
+    }
@@ -0,0 +1,110 @@
+import hashlib
+import inspect
+import json
+import os
+
+ARQUIVO_MANIFESTO = "data/processed/manifesto_build.json"
+
+
+def carregar_manifesto(caminho=ARQUIVO_MANIFESTO):
+    
+    if not os.path.exists(caminho):
+        return {'arquivos': {}, 'saidas': {}}
+    
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def salvar_manifesto(manifesto, caminho=ARQUIVO_MANIFESTO):
+    
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def hash_arquivo(caminho, manifesto):
+    
+    # O conteúdo só é relido quando tamanho ou data de modificação mudam; senão
+    # reaproveita o hash guardado, o que evita varrer gigabytes de microdados a cada execução.
+    if not os.path.exists(caminho):
+        return None
+    
+    if os.path.isdir(caminho):
+        return _hash_diretorio(caminho, manifesto)
+    
+    info = os.stat(caminho)
+    assinatura = [info.st_size, info.st_mtime_ns]
+    registro = manifesto['arquivos'].get(caminho)
+    if registro is not None and registro['assinatura'] == assinatura:
+        return registro['sha256']
+    
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            sha256.update(bloco)
+    
+    manifesto['arquivos'][caminho] = {'assinatura': assinatura, 'sha256': sha256.hexdigest()}
+    return sha256.hexdigest()
+
+
+def _hash_diretorio(caminho, manifesto):
+    
+    # Partições de dataset: combina caminho relativo e hash de cada arquivo, ignorando
+    # as pastas e arquivos ocultos de escrita em andamento.
+    arquivos = []
+    for raiz, pastas, nomes in os.walk(caminho):
+        pastas[:] = [pasta for pasta in pastas if not pasta.startswith(('.', '_'))]
+        arquivos += [os.path.join(raiz, nome) for nome in nomes if not nome.startswith(('.', '_'))]
+    
+    sha256 = hashlib.sha256()
+    for arquivo in sorted(arquivos):
+        sha256.update(os.path.relpath(arquivo, caminho).encode('utf-8'))
+        sha256.update(hash_arquivo(arquivo, manifesto).encode('utf-8'))
+    
+    return sha256.hexdigest()
+
+
+def hash_codigo(funcoes):
+    
+    # Versão do código de uma etapa: o fonte das funções e módulos que a implementam
+    # (mapeamentos, esquema) e o repr das constantes das quais ela depende.
+    sha256 = hashlib.sha256()
+    for funcao in funcoes:
+        if inspect.ismodule(funcao) or inspect.isfunction(funcao) or inspect.isclass(funcao):
+            fonte = inspect.getsource(funcao)
+        else:
+            fonte = repr(funcao)
+        sha256.update(fonte.encode('utf-8'))
+    
+    return sha256.hexdigest()
+
+
+def assinatura_etapa(etapa, manifesto):
+    
+    return {
+        'entradas': {caminho: hash_arquivo(caminho, manifesto) for caminho in etapa['entradas']},
+        'codigo': hash_codigo(etapa['codigo']),
+    }
+
+
+def etapa_atualizada(nome, etapa, manifesto):
+    
+    registro = manifesto['saidas'].get(nome)
+    if registro is None or not os.path.exists(etapa['saida']):
+        return False
+    
+    atual = assinatura_etapa(etapa, manifesto)
+    if any(hash_entrada is None for hash_entrada in atual['entradas'].values()):
+        return False
+    
+    return registro['entradas'] == atual['entradas'] and registro['codigo'] == atual['codigo']
+
+
+def registrar_etapa(nome, etapa, manifesto):
+    
+    manifesto['saidas'][nome] = {
+        'saida': etapa['saida'],
+        'sha256_saida': hash_arquivo(etapa['saida'], manifesto),
+        **assinatura_etapa(etapa, manifesto),
+    }
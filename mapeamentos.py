@@ -1,3 +1,9 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+ROTULO_NAO_INFORMADO = "Não Informado"
+
 
 QE_I19_LABELS = {
     "A": "Ninguém",
@@ -129,3 +135,61 @@ CO_GRUPO_LABELS = {
     6405: 'Engenharia Florestal',
     6411: 'Engenharia de Computação',
 }
+
+CO_MUNIC_JUIZ_DE_FORA = 3136702
+CO_IES_UFJF = 576
+
+# Municípios exibidos pelo nome no painel; os demais aparecem pelo código IBGE e pela UF.
+NOMES_MUNICIPIOS = {
+    CO_MUNIC_JUIZ_DE_FORA: 'Juiz de Fora',
+}
+
+
+# Forma compilada de um dicionário código -> rótulo: 'posicoes' leva a chave (pelo próprio
+# código inteiro ou pela posição em 'chaves', para códigos texto) ao código da categoria
+# em 'dtype'. A última posição atende códigos desconhecidos e nulos.
+TabelaRotulos = namedtuple('TabelaRotulos', ['chaves', 'posicoes', 'dtype'])
+
+
+def compilar_rotulos(rotulos, ausente=ROTULO_NAO_INFORMADO):
+    
+    # Rótulos repetidos (ex.: os dois "Não se aplica") viram uma única categoria.
+    categorias = list(dict.fromkeys(list(rotulos.values()) + ([ausente] if ausente is not None else [])))
+    codigo_ausente = categorias.index(ausente) if ausente is not None else -1
+    codigos = [categorias.index(rotulo) for rotulo in rotulos.values()]
+    
+    if all(isinstance(chave, int) for chave in rotulos):
+        chaves = None
+        posicoes = np.full(max(rotulos) + 2, codigo_ausente, dtype='int16')
+        posicoes[list(rotulos)] = codigos
+    else:
+        chaves = pd.Index(list(rotulos))
+        posicoes = np.array(codigos + [codigo_ausente], dtype='int16')
+    
+    return TabelaRotulos(chaves, posicoes, pd.CategoricalDtype(categorias))
+
+
+def decodificar(valores, tabela):
+    
+    # Um único take sobre os códigos: o resultado é categórico, então os textos dos
+    # rótulos só existem uma vez cada (nas categorias) e só viram strings ao exibir.
+    if tabela.chaves is None:
+        numeros = pd.Series(valores).to_numpy(dtype='float64', na_value=np.nan)
+        validos = (numeros >= 0) & (numeros < len(tabela.posicoes) - 1) & (numeros % 1 == 0)
+        indices = np.where(validos, numeros, -1).astype('intp')
+    else:
+        indices = tabela.chaves.get_indexer(valores)
+    
+    codigos = tabela.posicoes.take(indices)
+    return pd.Series(pd.Categorical.from_codes(codigos, dtype=tabela.dtype), index=getattr(valores, 'index', None))
+
+
+TABELA_UF_CURSO = compilar_rotulos(CO_UF_CURSO_LABELS)
+TABELA_UF_SIGLA = compilar_rotulos(CODIGO_UF_PARA_SIGLA)
+TABELA_REGIAO_CURSO = compilar_rotulos(CO_REGIAO_CURSO_LABELS)
+TABELA_RACA = compilar_rotulos(QE_I02_LABELS)
+TABELA_GENERO = compilar_rotulos(GENDER_LABELS)
+TABELA_PRESENCA = compilar_rotulos(TP_PR_GER_LABELS)
+TABELA_CATEGAD = compilar_rotulos(CO_CATEGAD_LABELS, ausente=None)
+TABELA_MODALIDADE = compilar_rotulos(CO_MODALIDADE_LABELS, ausente=None)
+TABELA_GRUPO = compilar_rotulos(CO_GRUPO_LABELS, ausente=None)
@@ -0,0 +1,139 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from esquema_microdados import ESQUEMA_MICRODADOS
+from mapeamentos import CO_CATEGAD_LABELS, CO_GRUPO_LABELS, CO_IES_UFJF, CO_MODALIDADE_LABELS, CO_MUNIC_JUIZ_DE_FORA, CO_UF_CURSO_LABELS, QE_I02_LABELS
+from tratamento_dados import ANO_PADRAO, ARQUIVO_IDH, arquivo_microdados
+
+# Proporções aproximadas das edições reais, usadas só para que os filtros e agregações
+# do ETL trabalhem sobre distribuições parecidas com as de produção.
+ESTUDANTES_POR_CURSO = 40
+CURSOS_POR_IES = 8
+CURSOS_POR_MUNICIPIO = 5
+MAXIMO_MUNICIPIOS = 2_000
+CO_ORGACAD = [10019, 10020, 10022, 10026, 10028]
+
+PROBABILIDADE_TP_PR_GER = {222: 0.12, 334: 0.001, 444: 0.01, 555: 0.82, 565: 0.02, 585: 0.019, 888: 0.01}
+PROBABILIDADE_SEM_RACA = 0.03
+
+LINHAS_POR_BLOCO = 500_000
+
+
+def _catalogo_cursos(rng, quantidade):
+    
+    # Um curso pertence a uma IES e a um município; os estudantes herdam esses códigos.
+    # Juiz de Fora e a UFJF sempre aparecem, para que o painel de município tenha dados.
+    ufs = rng.choice(list(CO_UF_CURSO_LABELS), max(quantidade // CURSOS_POR_MUNICIPIO, 1))
+    municipios = ufs.astype('int64') * 100_000 + rng.integers(0, 100_000, len(ufs))
+    municipios = rng.permutation(np.unique(municipios))[:MAXIMO_MUNICIPIOS]
+    municipios[0] = CO_MUNIC_JUIZ_DE_FORA
+    
+    cursos = pd.DataFrame({
+        'CO_CURSO': rng.choice(np.arange(1, max(quantidade * 10, 1_000_000)), quantidade, replace=False),
+        'CO_IES': rng.integers(1, max(quantidade // CURSOS_POR_IES, 2) + 1, quantidade),
+        'CO_CATEGAD': rng.choice(list(CO_CATEGAD_LABELS), quantidade),
+        'CO_ORGACAD': rng.choice(CO_ORGACAD, quantidade),
+        'CO_GRUPO': rng.choice(list(CO_GRUPO_LABELS), quantidade),
+        'CO_MODALIDADE': rng.choice(list(CO_MODALIDADE_LABELS), quantidade),
+        'CO_MUNIC_CURSO': rng.choice(municipios, quantidade),
+    })
+    juiz_de_fora = cursos.index[:max(quantidade // 100, 1)]
+    cursos.loc[juiz_de_fora, 'CO_MUNIC_CURSO'] = CO_MUNIC_JUIZ_DE_FORA
+    cursos.loc[juiz_de_fora[::2], 'CO_IES'] = CO_IES_UFJF
+    
+    cursos['CO_UF_CURSO'] = cursos['CO_MUNIC_CURSO'] // 100_000
+    cursos['CO_REGIAO_CURSO'] = cursos['CO_UF_CURSO'] // 10
+    
+    # Pesos log-normais: poucos cursos muito grandes e uma cauda longa de turmas pequenas.
+    pesos = rng.lognormal(0, 1, quantidade)
+    
+    return cursos, pesos / pesos.sum()
+
+
+def _nota(rng, linhas, media, desvio):
+    return np.round(np.clip(rng.normal(media, desvio, linhas), 0, 99.9), 1)
+
+
+def _gerar_bloco(rng, ano, cursos, pesos, linhas):
+    
+    estudantes = cursos.iloc[rng.choice(len(cursos), linhas, p=pesos)].reset_index(drop=True)
+    
+    situacao = rng.choice(list(PROBABILIDADE_TP_PR_GER), linhas, p=list(PROBABILIDADE_TP_PR_GER.values()))
+    presente = np.isin(situacao, [555, 888])
+    com_nota = situacao == 555
+    
+    raca = rng.choice(list(QE_I02_LABELS), linhas).astype(object)
+    raca[rng.random(linhas) < PROBABILIDADE_SEM_RACA] = None
+    
+    colunas = {
+        'NU_ANO': np.full(linhas, ano),
+        **{col: estudantes[col].to_numpy() for col in estudantes.columns},
+        'TP_PRES': np.where(presente, 555, 222),
+        'TP_PR_GER': situacao,
+        'NT_GER': np.where(com_nota, _nota(rng, linhas, 50, 15), np.nan),
+        'NT_FG': np.where(com_nota, _nota(rng, linhas, 55, 17), np.nan),
+        'NT_CE': np.where(com_nota, _nota(rng, linhas, 48, 16), np.nan),
+        'TP_SEXO': rng.choice(['F', 'M'], linhas, p=[0.6, 0.4]),
+        'NU_IDADE': np.clip(np.round(rng.gamma(2.0, 4.5, linhas) + 19), 17, 90).astype('int64'),
+        'QE_I02': raca,
+    }
+    
+    return {arq: pd.DataFrame({col: colunas[col] for col in esquema}) for arq, esquema in ESQUEMA_MICRODADOS.items()}
+
+
+def gerar_microdados_sinteticos(linhas, destino='.', ano=ANO_PADRAO, semente=0, linhas_por_bloco=LINHAS_POR_BLOCO):
+    
+    # Grava os arquivos arq* no mesmo layout dos microdados do INEP (latin1, ';' e vírgula
+    # decimal), com as colunas na ordem do esquema. A geração é feita em blocos para que
+    # 10 milhões de linhas caibam na memória de uma máquina de testes.
+    rng = np.random.default_rng(semente)
+    cursos, pesos = _catalogo_cursos(rng, max(linhas // ESTUDANTES_POR_CURSO, 10))
+    
+    caminhos = {arq: os.path.join(destino, arquivo_microdados(ano, arq)) for arq in ESQUEMA_MICRODADOS}
+    os.makedirs(os.path.dirname(next(iter(caminhos.values()))), exist_ok=True)
+    
+    gravadas = 0
+    while gravadas < linhas:
+        tamanho = min(linhas_por_bloco, linhas - gravadas)
+        for arq, df in _gerar_bloco(rng, ano, cursos, pesos, tamanho).items():
+            df.to_csv(
+                caminhos[arq], sep=';', decimal=',', float_format='%.1f', na_rep='',
+                encoding='latin1', index=False, header=gravadas == 0, mode='w' if gravadas == 0 else 'a'
+            )
+        gravadas += tamanho
+    
+    print(f"Microdados sintéticos gerados com sucesso ({linhas} linhas, {len(cursos)} cursos, em {destino}).")
+    
+    return caminhos
+
+
+def gerar_idh_sintetico(destino='.', semente=0):
+    
+    # Planilha no formato exportado pelo Atlas Brasil, com uma linha por UF.
+    rng = np.random.default_rng(semente)
+    ufs = list(CO_UF_CURSO_LABELS.values())
+    df_idh = pd.DataFrame({
+        'Territorialidades': ufs,
+        'IDHM 2021': np.round(rng.uniform(0.65, 0.85, len(ufs)), 3),
+        'IDHM Educação 2021': np.round(rng.uniform(0.60, 0.80, len(ufs)), 3),
+        'IDHM Renda 2021': np.round(rng.uniform(0.60, 0.85, len(ufs)), 3),
+    })
+    
+    caminho = os.path.join(destino, ARQUIVO_IDH)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    df_idh.to_excel(caminho, index=False)
+    
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera microdados sintéticos do ENADE no layout dos arquivos do INEP.")
+    parser.add_argument('--linhas', type=int, default=100_000, help="Número de estudantes (ex.: 100000 a 10000000).")
+    parser.add_argument('--destino', default='.', help="Pasta raiz onde data/raw/enade e data/processed são criadas.")
+    parser.add_argument('--ano', type=int, default=ANO_PADRAO, help="Edição gravada em NU_ANO e no nome dos arquivos.")
+    parser.add_argument('--semente', type=int, default=0, help="Semente do gerador aleatório.")
+    args = parser.parse_args()
+    
+    gerar_microdados_sinteticos(args.linhas, args.destino, args.ano, args.semente)
+    gerar_idh_sintetico(args.destino, args.semente)
@@ -1,10 +1,6 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import statsmodels.api as sm
-import json
-from urllib.request import urlopen
-from mapeamentos import CODIGO_UF_PARA_SIGLA
+from acesso_dados import DIRETORIO_CUBO, DIRETORIO_IDH_NOTAS, filtros_sidebar, geometria_uf, load_cubo, media_cubo, seletor_edicao, versao_edicao
+from figuras import ALTURA_MAPA, contagem_cubo, figura_inscritos_regiao, figura_mapa_uf, figura_regressao_idh, load_idh_notes_data, regressao_idh
 
 st.set_page_config(
     page_title="Prova Prática CAEd - ENADE 2023",
@@ -13,21 +9,9 @@ st.set_page_config(
 )
 
 
-@st.cache_data
-def load_data():
-    arquivo_parquet = "data/processed/dados_gerais_estudantes.parquet"
-    return pd.read_parquet(arquivo_parquet)
-
-@st.cache_data
-def load_idh_notes_data():
-    arquivo_parquet = "data/processed/idh_notas_estudos.parquet"
-    return pd.read_parquet(arquivo_parquet)
-
-@st.cache_data
-def get_geojson():
-    url = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
-    with urlopen(url) as response:
-        return json.load(response)
+ano = seletor_edicao()
+versao = versao_edicao(DIRETORIO_CUBO, ano)
+filtros = filtros_sidebar(ano, versao)
 
 with st.sidebar:
     st.caption("Dados do IDHM 2021 são oriundos do portal oficial do Atlas Brasil (www.atlasbrasil.com.br)")
@@ -35,19 +19,24 @@ with st.sidebar:
 st.title("Panorama geográfico do exame")
 
 try:
-    df = load_data()
-    geojson_brasil = get_geojson()
+    totais = load_cubo(ano, versao, medidas=('qtd', 'qtd_presentes', 'qtd_idade', 'soma_idade'), filtros=filtros)
+    geojson_brasil = geometria_uf(ALTURA_MAPA)
     
-    total_alunos = len(df)
-    total_presentes = df[df['Presenca'].astype(str).str.contains('Presente', case=False, na=False)].shape[0]
+    total_alunos = totais['qtd'].sum()
+    if total_alunos == 0:
+        st.warning("Nenhum estudante atende aos filtros selecionados.")
+        st.stop()
+    total_presentes = totais['qtd_presentes'].sum()
     perc_presenca = (total_presentes / total_alunos) * 100
-    media_idade = df['NU_IDADE'].mean()
+    media_idade = media_cubo(totais, 'soma_idade', 'qtd_idade')
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total de Inscritos", f"{total_alunos:,.0f}".replace(",", "."))
     col2.metric("Taxa de Presença", f"{perc_presenca:.1f}%")
     col3.metric("Média de Idade", f"{media_idade:.0f} anos")
-    col4.metric("Região Predominante", df['Desc_Regiao_Curso'].mode()[0])
+    
+    dados_regiao = contagem_cubo(ano, versao, 'Desc_Regiao_Curso', 'Regiao', filtros)
+    col4.metric("Região Predominante", dados_regiao.iloc[0]['Regiao'])
 
     st.divider()
 
@@ -56,59 +45,23 @@ try:
     
     st.markdown("A distribuição espacial dos inscritos no ENADE 2023 espelha as dimensões continentais do Brasil. O gráfico de barras e o mapa evidenciam a **hegemonia da Região Sudeste**, que sozinha concentra quase metade dos estudantes avaliados (aproximadamente **187 mil**). Isso reflete a densidade populacional e, principalmente, a concentração de infraestrutura universitária nos estados de SP, RJ e MG. ")
 
-    dados_uf = df['Desc_UF_Curso'].value_counts().reset_index()
-    dados_uf.columns = ['UF', 'Total']
+    dados_uf = contagem_cubo(ano, versao, 'Desc_UF_Curso', 'UF', filtros)
     
-    dados_regiao = df['Desc_Regiao_Curso'].value_counts().reset_index()
-    dados_regiao.columns = ['Regiao', 'Total']
-
-    if 'CO_UF_CURSO' in df.columns:
-        df['UF_SIGLA_MAPA'] = df['CO_UF_CURSO'].map(CODIGO_UF_PARA_SIGLA)
-        dados_mapa = df['UF_SIGLA_MAPA'].value_counts().reset_index()
-        dados_mapa.columns = ['UF', 'Total']
+    dados_mapa = contagem_cubo(ano, versao, 'UF_SIGLA', 'UF', filtros)
 
     col_regiao, col_mapa = st.columns([2, 3], gap="medium")
 
     
     with col_regiao:
-        fig_reg = px.bar(
-            dados_regiao,
-            x='Regiao', y='Total',
-            color='Regiao', text='Total',
-            color_discrete_sequence=px.colors.qualitative.Safe
-        )
-        fig_reg.update_traces(textposition='outside')
-        fig_reg.update_layout(
-            showlegend=False, xaxis_title="", yaxis_title="",
-            margin=dict(t=30, b=0), height=400,
-            title="Inscritos por Região"
-        )
+        fig_reg = figura_inscritos_regiao(dados_regiao)
         st.plotly_chart(fig_reg, use_container_width=True)
     
     with col_mapa:
-        if 'CO_UF_CURSO' in df.columns:
-            fig_mapa = px.choropleth(
-                dados_mapa,
-                geojson=geojson_brasil,
-                locations='UF',        
-                featureidkey='properties.sigla', 
-                color='Total',
-                color_continuous_scale="Blues",
-                hover_name='UF',
-                hover_data={'UF': False, 'Total': True},
-                labels={'Total': 'Inscritos'}
-            )
-            fig_mapa.update_geos(fitbounds="locations", visible=False)
-            fig_mapa.update_layout(
-                margin={"r":0,"t":0,"l":0,"b":0},
-                paper_bgcolor="white",
-                plot_bgcolor="white",
-                height=400
-            )
-            st.plotly_chart(fig_mapa, use_container_width=True)
-            st.caption("""
-                **Dica:** Passe o mouse sobre qualquer estado para ver o número exato de estudantes inscritos naquela unidade federativa.
-            """)
+        fig_mapa = figura_mapa_uf(dados_mapa, geojson_brasil)
+        st.plotly_chart(fig_mapa, use_container_width=True)
+        st.caption("""
+            **Dica:** Passe o mouse sobre qualquer estado para ver o número exato de estudantes inscritos naquela unidade federativa.
+        """)
 
 
     st.markdown("**Estados com mais inscritos**")
@@ -117,7 +70,7 @@ try:
     c1, c2, c3 = st.columns(3)
     medalhas = ["1º Lugar", "2º Lugar", "3º Lugar"]
     
-    for i, col in enumerate([c1, c2, c3]):
+    for i, col in enumerate([c1, c2, c3][:len(top3)]):
         with col:
             st.container(border=True).metric(
                 label=f"{medalhas[i]} - {top3.iloc[i]['UF']}", 
@@ -130,7 +83,7 @@ try:
     c4, c5, c6 = st.columns(3)
     labels_bottom = ["1º Lugar", "2º Lugar", "3º Lugar"]
     
-    for i, col in enumerate([c4, c5, c6]):
+    for i, col in enumerate([c4, c5, c6][:len(bottom3)]):
         with col:
             st.container(border=True).metric(
                 label=f"{labels_bottom[i]} - {bottom3.iloc[i]['UF']}", 
@@ -143,25 +96,16 @@ try:
     st.markdown("Partindo do pretexto que o IDH é um indicador que leva em conta três pilares: saúde, **educação** e renda. Podemos estabelecer uma relação entre o desenvolvimento educacional de um estado e o desempenho dos estudantes daquele local?")
     st.markdown("O subíndice do IDHM relativo à educação, é obtido a partir da taxa de alfabetização e da taxa bruta de frequência à escola, convertidas em índices por: (valor observado - limite inferior) / (limite superior - limite inferior), com limites inferior e superior de 0% e 100%. O IDH-Educação é a média desses 2 índices, com peso 2 para taxa de alfabetização e peso 1 para o da taxa bruta de frequência. ")
 
-    df_regressao_raw = load_idh_notes_data()
+    if filtros:
+        st.caption("A regressão usa todos os estudantes de cada UF; os filtros da barra lateral não se aplicam a esta seção.")
+
+    df_regressao_raw = load_idh_notes_data(ano, versao_edicao(DIRETORIO_IDH_NOTAS, ano))
 
     if df_regressao_raw is not None:
         
-        if 'NT_GER' in df_regressao_raw.columns and 'IDHM Educação 2021' in df_regressao_raw.columns:
+        if 'soma_nota' in df_regressao_raw.columns and 'IDHM Educação 2021' in df_regressao_raw.columns:
             
-            df_analise = df_regressao_raw.groupby('Territorialidades').agg({
-                'IDHM Educação 2021': 'mean',     
-                'NT_GER': 'mean',        
-                'Territorialidades': 'count' 
-            }).rename(columns={'Territorialidades': 'Qtd_Alunos'})
-            
-            df_analise = df_analise.reset_index()
-
-            X = df_analise['IDHM Educação 2021']
-            Y = df_analise['NT_GER']
-            X_const = sm.add_constant(X)
-            
-            modelo = sm.OLS(Y, X_const).fit()
+            df_analise, modelo = regressao_idh(df_regressao_raw)
             
             r2 = modelo.rsquared
             p_valor = modelo.pvalues['IDHM Educação 2021']
@@ -171,28 +115,7 @@ try:
 
 
             with col_graf:
-                fig_scatter = px.scatter(
-                    df_analise,
-                    x='IDHM Educação 2021',
-                    y='NT_GER',
-                    text='Territorialidades', 
-                    size='Qtd_Alunos',       
-                    trendline='ols',
-                    title="Regressão linear: IDHM Educação estadual vs. nota geral média no ENADE 2023",
-                    labels={'IDHM 2021': 'IDH (2021)', 'NT_GER': 'Nota geral média (0-99)', 'Territorialidades': 'UF', 'Qtd_Alunos':'Alunos'},
-                    hover_data=['Qtd_Alunos']
-                )
-                
-                fig_scatter.update_traces(
-                    textposition='top center',
-                    marker=dict(color="#087ac6", line=dict(width=1, color='white'))
-                )
-                
-                fig_scatter.update_layout(
-                    height=500,
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)"
-                )
+                fig_scatter = figura_regressao_idh(df_analise, ano)
                 st.plotly_chart(fig_scatter, use_container_width=True)
 
 
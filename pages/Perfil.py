@@ -1,10 +1,6 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
-from pywaffle import Waffle
-import numpy as np
-from tratamento_dados import tratar_dados_gerais, relacionar_idh_estados_nota
+from acesso_dados import DIRETORIO_CUBO, filtros_sidebar, load_cubo, media_cubo, seletor_edicao, versao_edicao
+from figuras import CORES_RACA, distribuicao_raca, figura_genero_curso, figura_genero_regiao, png_waffle_raca
 
 st.set_page_config(
     page_title="Prova Prática CAEd - ENADE 2023",
@@ -12,17 +8,38 @@ st.set_page_config(
     layout="wide"
 )
 
+
+@st.cache_data
+def imagem_waffle_raca(ano, versao, filtros):
+
+    # O mosaico só muda com os dados da edição e com os filtros: é desenhado uma vez por
+    # combinação e guardado como PNG. A mesma versao da chave é a usada para ler o cubo,
+    # então um PNG em cache nunca mostra a distribuição de outra versão dos dados.
+    return png_waffle_raca(distribuicao_raca(ano, versao, filtros))
+
+
+ano = seletor_edicao()
+versao = versao_edicao(DIRETORIO_CUBO, ano)
+filtros = filtros_sidebar(ano, versao)
+
+# A página só lê o cubo de agregados gerado pelo ETL (python tratamento_dados.py).
 try:
    
-    df = tratar_dados_gerais() 
+    totais = load_cubo(ano, versao, medidas=('qtd', 'qtd_idade', 'soma_idade'), filtros=filtros)
+    total_estudantes = totais['qtd'].sum()
+    if total_estudantes == 0:
+        st.warning("Nenhum estudante atende aos filtros selecionados.")
+        st.stop()
 
     st.title("Breve análise do perfil de gênero e raça dos inscritos no ENADE 2023")
     
     col_k1, col_k2, col_k3, col_k4 = st.columns(4)
-    col_k1.metric("Total Estudantes", f"{len(df):,.0f}".replace(",", "."))
-    col_k2.metric("Média de Idade", f"{df['NU_IDADE'].mean():.0f} anos")
-    perc_fem = (len(df[df['Desc_Genero'] == 'Feminino']) / len(df)) * 100
-    raca_predominante = df['Desc_Raca'].mode()[0]
+    col_k1.metric("Total Estudantes", f"{total_estudantes:,.0f}".replace(",", "."))
+    col_k2.metric("Média de Idade", f"{media_cubo(totais, 'soma_idade', 'qtd_idade'):.0f} anos")
+    por_genero = load_cubo(ano, versao, ('Desc_Genero',), filtros=filtros).set_index('Desc_Genero')['qtd']
+    perc_fem = (por_genero.get('Feminino', 0) / total_estudantes) * 100
+    raca_counts = distribuicao_raca(ano, versao, filtros)
+    raca_predominante = raca_counts.iloc[0]['Raça']
     col_k3.metric("Mulheres", f"{perc_fem:.1f}%")
     col_k4.metric("Raça predominante:", f"{raca_predominante}")
     
@@ -34,34 +51,11 @@ try:
     st.markdown("""
     """)
 
-    raca_counts = df['Desc_Raca'].value_counts().reset_index()
-    raca_counts.columns = ['Raça', 'Total']
-    total_geral = raca_counts['Total'].sum()
-    raca_counts['Porcentagem'] = (raca_counts['Total'] / total_geral) * 100
-    
-    cores_map = {
-        'Branca': '#468996', 'Parda': '#00B050', 'Preta': '#FF555E', 
-        'Amarela': '#FFC000', 'Indígena': '#C65911'
-    }
-    
-    data_waffle = dict(zip(raca_counts['Raça'], raca_counts['Porcentagem']))
-    colors_list = [cores_map.get(r, '#999999') for r in data_waffle.keys()]
-
-    fig_waffle = plt.figure(
-        FigureClass=Waffle,
-        rows=5, columns=20,
-        values=data_waffle, colors=colors_list,
-        rounding_rule='nearest',
-        legend={'loc': 'upper right', 'bbox_to_anchor': (1, 1), 'framealpha': 0},
-        figsize=(12, 5),
-        block_arranging_style='snake'
-    )
-    plt.legend().remove() 
-    st.pyplot(fig_waffle)
+    st.image(imagem_waffle_raca(ano, versao, filtros), width='stretch')
 
     cols_leg = st.columns(len(raca_counts))
     for idx, (index, row) in enumerate(raca_counts.iterrows()):
-        cor = cores_map.get(row['Raça'], '#333333')
+        cor = CORES_RACA.get(row['Raça'], '#333333')
         with cols_leg[idx]:
             st.markdown(f"<span style='color:{cor}'>■</span> **{row['Raça']}**: {row['Porcentagem']:.1f}%", unsafe_allow_html=True)
 
@@ -73,63 +67,14 @@ try:
        A distribuição de gênero é uniforme pelo país?
     """)
 
-    df_regiao_sexo = df.groupby(['Desc_Regiao_Curso', 'Desc_Genero']).size().reset_index(name='Contagem')
-    
-    fig_regiao = px.bar(
-        df_regiao_sexo,
-        x="Desc_Regiao_Curso",
-        y="Contagem",
-        color="Desc_Genero",
-        barmode="group",
-        title="Comparativo Regional: Homens vs. Mulheres",
-        color_discrete_map={'Feminino': '#E74C3C', 'Masculino': '#3498DB'},
-        text_auto='.2s'
-    )
-    fig_regiao.update_layout(height=500, xaxis_title="Região", yaxis_title="Número de Estudantes")
+    fig_regiao = figura_genero_regiao(ano, versao, filtros)
     st.plotly_chart(fig_regiao, use_container_width=True)
     
 
     st.divider()
     st.header("Quais cursos são dominados por homens ou mulheres?")
 
-    df_curso_sexo = df.groupby(['NOME_CURSO', 'Desc_Genero']).size().reset_index(name='Contagem')
-    
-    df_total_curso = df_curso_sexo.groupby('NOME_CURSO')['Contagem'].transform('sum')
-    df_curso_sexo['Percentual'] = (df_curso_sexo['Contagem'] / df_total_curso) * 100
-    
-    cursos_relevantes = df['NOME_CURSO'].value_counts()
-    cursos_relevantes = cursos_relevantes[cursos_relevantes > 1].index.tolist()
-    
-    df_gap = df_curso_sexo[df_curso_sexo['NOME_CURSO'].isin(cursos_relevantes)].copy()
-
-    pivo = df_gap.pivot(index='NOME_CURSO', columns='Desc_Genero', values='Percentual').fillna(0)
-    
-    if 'Feminino' in pivo.columns:
-        ordem_cursos = pivo.sort_values('Feminino', ascending=True).index.tolist()
-    else:
-        ordem_cursos = pivo.index.tolist()
-
-    fig_gap = px.bar(
-        df_gap,
-        y="NOME_CURSO",
-        x="Percentual",
-        color="Desc_Genero",
-        orientation='h', 
-        title="Divisão de Gênero por Curso (Ordenado por Presença Feminina)",
-        color_discrete_map={'Feminino': '#E74C3C', 'Masculino': '#3498DB'},
-        text_auto='.1f',
-        category_orders={"NOME_CURSO": ordem_cursos} 
-    )
-
-    fig_gap.update_layout(
-        height=800,
-        xaxis_title="% do Curso",
-        yaxis_title="",
-        barmode='relative', 
-        xaxis_range=[0, 100]
-    )
-    
-    fig_gap.add_vline(x=50, line_dash="dash", line_color="gray", annotation_text="Equilíbrio (50%)")
+    fig_gap = figura_genero_curso(ano, versao, filtros)
 
     st.plotly_chart(fig_gap, use_container_width=True)
 
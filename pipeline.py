@@ -0,0 +1,181 @@
+import os
+import platform
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from instrumentacao import medir_etapa
+
+# Nó do grafo do ETL: 'funcao' recebe, em ordem, os resultados das dependências.
+# Para rodar em outro processo, funcao e resultados precisam ser serializáveis (pickle).
+Etapa = namedtuple('Etapa', ['nome', 'funcao', 'dependencias'], defaults=[()])
+
+
+def ordenar_etapas(etapas):
+    
+    por_nome = {etapa.nome: etapa for etapa in etapas}
+    if len(por_nome) != len(etapas):
+        raise ValueError("Há etapas com nomes repetidos no grafo.")
+    
+    for etapa in etapas:
+        faltantes = [dep for dep in etapa.dependencias if dep not in por_nome]
+        if faltantes:
+            raise ValueError(f"A etapa {etapa.nome} depende de etapas inexistentes: {', '.join(faltantes)}")
+    
+    ordem, visitadas, em_visita = [], set(), set()
+    
+    def visitar(nome):
+        if nome in visitadas:
+            return
+        if nome in em_visita:
+            raise ValueError(f"O grafo de etapas possui um ciclo passando por {nome}.")
+        em_visita.add(nome)
+        for dep in por_nome[nome].dependencias:
+            visitar(dep)
+        em_visita.discard(nome)
+        visitadas.add(nome)
+        ordem.append(por_nome[nome])
+    
+    for etapa in etapas:
+        visitar(etapa.nome)
+    
+    return ordem
+
+
+def executar_grafo(etapas, workers=None, ao_concluir=None, diretorio_perfil=None):
+    
+    # Submete ao pool toda etapa cujas dependências já terminaram. O resultado de uma
+    # etapa é descartado assim que a última dependente é submetida, então apenas os
+    # resultados das etapas finais (sem dependentes) são devolvidos, junto com a
+    # medida (tempo, CPU, memória, linhas e bytes) de cada etapa.
+    ordem = ordenar_etapas(etapas)
+    dependentes = {etapa.nome: [] for etapa in ordem}
+    for etapa in ordem:
+        # Uma dependência repetida conta uma vez, como na liberação e na contagem abaixo.
+        for dep in dict.fromkeys(etapa.dependencias):
+            dependentes[dep].append(etapa.nome)
+    
+    por_nome = {etapa.nome: etapa for etapa in ordem}
+    faltando = {etapa.nome: len(set(etapa.dependencias)) for etapa in ordem}
+    usos_restantes = {nome: len(lista) for nome, lista in dependentes.items()}
+    resultados, medidas = {}, {}
+    
+    def argumentos(etapa):
+        valores = [resultados[dep] for dep in etapa.dependencias]
+        for dep in set(etapa.dependencias):
+            usos_restantes[dep] -= 1
+            if usos_restantes[dep] == 0:
+                del resultados[dep]
+        return valores
+    
+    def concluir(nome, resultado, medida):
+        resultados[nome] = resultado
+        medidas[nome] = medida
+        if ao_concluir is not None:
+            ao_concluir(nome, resultado, medida)
+        liberadas = []
+        for dependente in dependentes[nome]:
+            faltando[dependente] -= 1
+            if faltando[dependente] == 0:
+                liberadas.append(por_nome[dependente])
+        return liberadas
+    
+    if workers == 1:
+        for etapa in ordem:
+            resultado, medida = medir_etapa(etapa.nome, etapa.funcao, argumentos(etapa), diretorio_perfil)
+            concluir(etapa.nome, resultado, medida)
+        return resultados, medidas
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        em_execucao = {}
+    
+        def submeter(etapa):
+            futuro = executor.submit(medir_etapa, etapa.nome, etapa.funcao, argumentos(etapa), diretorio_perfil)
+            em_execucao[futuro] = etapa.nome
+    
+        for etapa in ordem:
+            if faltando[etapa.nome] == 0:
+                submeter(etapa)
+    
+        try:
+            while em_execucao:
+                concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    nome = em_execucao.pop(futuro)
+                    resultado, medida = futuro.result()
+                    for etapa in concluir(nome, resultado, medida):
+                        submeter(etapa)
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    
+    return resultados, medidas
+
+
+def caminho_critico(etapas, duracoes):
+    
+    # Caminho mais longo do grafo ponderado pelas durações medidas: é o limite inferior
+    # do tempo total, por mais workers que existam.
+    custo, anterior = {}, {}
+    for etapa in ordenar_etapas(etapas):
+        deps = [dep for dep in etapa.dependencias if dep in custo]
+        melhor = max(deps, key=custo.get, default=None)
+        custo[etapa.nome] = duracoes.get(etapa.nome, 0.0) + (custo[melhor] if melhor else 0.0)
+        anterior[etapa.nome] = melhor
+    
+    if not custo:
+        return [], 0.0
+    
+    nome = max(custo, key=custo.get)
+    total = custo[nome]
+    caminho = []
+    while nome is not None:
+        caminho.append(nome)
+        nome = anterior[nome]
+    
+    return caminho[::-1], total
+
+
+def _formatar(valor, formato):
+    return '-' if valor is None else format(valor, formato)
+
+
+def relatorio_grafo(etapas, medidas, tempo_total):
+    
+    duracoes = {nome: medida['segundos'] for nome, medida in medidas.items()}
+    caminho, duracao_caminho = caminho_critico(etapas, duracoes)
+    soma = sum(duracoes.values())
+    
+    print(f"  {'Etapa':<40} {'tempo':>9} {'CPU':>9} {'RSS (MB)':>9} {'linhas/s':>11} {'lidos (MB)':>11} {'escritos (MB)':>14}")
+    for etapa in ordenar_etapas(etapas):
+        medida = medidas.get(etapa.nome)
+        if medida is None:
+            continue
+        lidos = medida['bytes_lidos'] / 2**20 if medida['bytes_lidos'] is not None else None
+        escritos = medida['bytes_escritos'] / 2**20 if medida['bytes_escritos'] is not None else None
+        print(
+            f"  {etapa.nome:<40} {medida['segundos']:8.2f}s {medida['segundos_cpu']:8.2f}s {_formatar(medida['pico_rss_mb'], '9.0f')} "
+            f"{_formatar(medida['linhas_por_segundo'], '11,')} {_formatar(lidos, '11.1f')} {_formatar(escritos, '14.1f')}"
+        )
+    print(f"Caminho crítico ({duracao_caminho:.2f}s): {' -> '.join(caminho)}")
+    print(f"Tempo total: {tempo_total:.2f}s (soma das etapas: {soma:.2f}s, paralelismo efetivo: {soma / tempo_total if tempo_total else 0:.1f}x)")
+
+
+def relatorio_execucao(etapas, medidas, tempo_total, inicio, parametros=None):
+    
+    # Versão legível por máquina do relatório acima, para acompanhar a vazão do ETL
+    # entre execuções (um arquivo JSON por execução).
+    duracoes = {nome: medida['segundos'] for nome, medida in medidas.items()}
+    caminho, duracao_caminho = caminho_critico(etapas, duracoes)
+    
+    return {
+        'inicio': inicio.isoformat(timespec='seconds'),
+        'fim': datetime.now().isoformat(timespec='seconds'),
+        'parametros': parametros or {},
+        'ambiente': {'python': platform.python_version(), 'plataforma': platform.platform(), 'cpus': os.cpu_count()},
+        'tempo_total': round(tempo_total, 4),
+        'caminho_critico': {'etapas': caminho, 'segundos': round(duracao_caminho, 4)},
+        'etapas': {
+            etapa.nome: {'dependencias': list(etapa.dependencias), **medidas[etapa.nome]}
+            for etapa in ordenar_etapas(etapas) if etapa.nome in medidas
+        },
+    }
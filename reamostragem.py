@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+REAMOSTRAGENS_PADRAO = 2000
+CONFIANCA_PADRAO = 0.95
+
+# Limite de sorteios (réplicas x alunos) materializados de uma vez; acima dele as réplicas
+# são geradas em lotes, para que uma seleção nacional caiba em memória.
+SORTEIOS_POR_LOTE = 5_000_000
+
+
+def medias_bootstrap(valores, grupos, reamostragens=REAMOSTRAGENS_PADRAO, semente=0):
+    
+    # Bootstrap da média de todos os grupos ao mesmo tempo: cada réplica sorteia, com
+    # reposição, tantos alunos de cada grupo quanto ele tem, e as somas por grupo saem de
+    # um único reduceat sobre os alunos ordenados por grupo. Devolve os rótulos dos grupos
+    # e a matriz de médias (réplicas x grupos).
+    rotulos, codigos = np.unique(np.asarray(grupos), return_inverse=True)
+    ordem = np.argsort(codigos, kind='stable')
+    valores = np.asarray(valores, dtype='float64')[ordem]
+    
+    tamanhos = np.bincount(codigos, minlength=len(rotulos))
+    inicios = np.cumsum(tamanhos) - tamanhos
+    base = np.repeat(inicios, tamanhos)
+    limite = np.repeat(tamanhos, tamanhos)
+    
+    rng = np.random.default_rng(semente)
+    medias = np.empty((reamostragens, len(rotulos)))
+    lote = max(1, SORTEIOS_POR_LOTE // max(len(valores), 1))
+    for primeira in range(0, reamostragens, lote):
+        replicas = min(lote, reamostragens - primeira)
+        posicoes = base + rng.integers(0, limite, size=(replicas, len(valores)))
+        medias[primeira:primeira + replicas] = np.add.reduceat(valores[posicoes], inicios, axis=1) / tamanhos
+    
+    return rotulos, medias
+
+
+def ranking_bootstrap(valores, grupos, topo=10, reamostragens=REAMOSTRAGENS_PADRAO, confianca=CONFIANCA_PADRAO, semente=0):
+    
+    # Ranking por média (posição 1 = maior média) com intervalo de confiança da média,
+    # faixa de posições que o grupo ocupa nas réplicas e a chance de ficar entre os 'topo'
+    # primeiros: grupos com faixas largas ou chances baixas estão empatados com vizinhos.
+    rotulos, medias = medias_bootstrap(valores, grupos, reamostragens, semente)
+    observadas = pd.Series(np.asarray(valores, dtype='float64')).groupby(np.asarray(grupos)).agg(['mean', 'count']).loc[rotulos]
+    posicoes = (-medias).argsort(axis=1, kind='stable').argsort(axis=1, kind='stable') + 1
+    cauda = (1 - confianca) / 2 * 100
+    
+    ranking = pd.DataFrame({
+        'grupo': rotulos,
+        'media': observadas['mean'].to_numpy(),
+        'qtd': observadas['count'].to_numpy(),
+        'ic_inferior': np.percentile(medias, cauda, axis=0),
+        'ic_superior': np.percentile(medias, 100 - cauda, axis=0),
+        'posicao_melhor': np.percentile(posicoes, cauda, axis=0, method='lower').astype('int64'),
+        'posicao_pior': np.percentile(posicoes, 100 - cauda, axis=0, method='higher').astype('int64'),
+        'prob_topo': (posicoes <= topo).mean(axis=0),
+    })
+    ranking['posicao'] = ranking['media'].rank(ascending=False, method='first').astype('int64')
+    
+    return ranking.sort_values('posicao').reset_index(drop=True)
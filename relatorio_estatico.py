@@ -0,0 +1,271 @@
+import argparse
+import glob
+import html
+import importlib.util
+import os
+import time
+from functools import partial
+from plotly.offline import get_plotlyjs
+from streamlit.logger import set_log_level
+
+# Fora de uma sessão do Streamlit os caches de acesso_dados/figuras viram caches em memória
+# de cada processo, e o Streamlit avisa isso ao decorar cada função; por isso o nível de log
+# é ajustado antes de importar os módulos do painel.
+set_log_level('error')
+
+from acesso_dados import DIRETORIO_CUBO, DIRETORIO_IDH_NOTAS, DIRETORIO_NOTAS_MUNICIPIOS, anos_disponiveis, estatisticas_histograma, geometria_uf, histogramas_municipio, indice_municipios, load_cubo, media_cubo, versao_edicao
+from figuras import ALTURA_MAPA, contagem_cubo, distribuicao_raca, figura_genero_curso, figura_genero_regiao, figura_histograma_notas, figura_inscritos_regiao, figura_mapa_uf, figura_media_tipo_ies, figura_notas_cursos_ufjf, figura_ranking_ufjf, figura_regressao_idh, figura_top_cursos, load_data_jf, load_idh_notes_data, png_waffle_raca, regressao_idh
+from mapeamentos import CODIGO_UF_PARA_SIGLA, CO_MUNIC_JUIZ_DE_FORA, CO_UF_CURSO_LABELS, NOMES_MUNICIPIOS
+from pipeline import Etapa, executar_grafo, relatorio_grafo
+
+DIRETORIO_RELATORIOS_ESTATICOS = "relatorios"
+ESCOPO_NACIONAL = 'BR'
+ESCOPOS = [ESCOPO_NACIONAL] + sorted(CODIGO_UF_PARA_SIGLA.values())
+SIGLA_PARA_CODIGO_UF = {sigla: codigo for codigo, sigla in CODIGO_UF_PARA_SIGLA.items()}
+
+# O plotly.js (~4 MB) é gravado uma vez na raiz da exportação e referenciado por todas as
+# páginas, que assim continuam funcionando sem acesso à rede.
+ARQUIVO_PLOTLYJS = "plotly.min.js"
+LARGURA_PNG = 1200
+
+ESTILO = """
+body { font-family: Helvetica, Arial, sans-serif; color: #2C3E50; max-width: 1200px; margin: 0 auto; padding: 20px; }
+h1 { border-bottom: 3px solid #3498db; padding-bottom: 8px; }
+h2 { margin-top: 40px; border-bottom: 1px solid #ddd; }
+.indicadores { display: flex; flex-wrap: wrap; gap: 16px; }
+.indicador { background-color: #f8f9fa; border-left: 5px solid #3498db; padding: 12px 20px; border-radius: 6px; }
+.indicador span { display: block; font-size: 0.85rem; color: #555; }
+.indicador strong { font-size: 1.6rem; }
+.legenda { color: #666; font-size: 0.9rem; }
+img { max-width: 100%; }
+"""
+
+
+def _numero(valor):
+    return f"{valor:,.0f}".replace(",", ".")
+
+
+class PaginaRelatorio:
+    
+    # Acumula os blocos de uma página HTML estática. Cada figura do plotly vira um <div>
+    # interativo e, com png=True (requer o pacote kaleido), também um PNG em figuras/.
+    
+    def __init__(self, pasta, titulo, png=False):
+        self.pasta = pasta
+        self.titulo = titulo
+        self.png = png
+        self.blocos = []
+        self.figuras = 0
+        os.makedirs(os.path.join(pasta, 'figuras'), exist_ok=True)
+    
+    def secao(self, titulo):
+        self.blocos.append(f"<h2>{html.escape(titulo)}</h2>")
+    
+    def subtitulo(self, titulo):
+        self.blocos.append(f"<h3>{html.escape(titulo)}</h3>")
+    
+    def legenda(self, texto):
+        self.blocos.append(f"<p class='legenda'>{html.escape(texto)}</p>")
+    
+    def indicadores(self, valores):
+        cartoes = "".join(
+            f"<div class='indicador'><span>{html.escape(rotulo)}</span><strong>{html.escape(str(valor))}</strong></div>"
+            for rotulo, valor in valores.items()
+        )
+        self.blocos.append(f"<div class='indicadores'>{cartoes}</div>")
+    
+    def figura(self, nome, fig):
+        self.figuras += 1
+        if self.png:
+            fig.write_image(os.path.join(self.pasta, 'figuras', f"{self.figuras:02d}-{nome}.png"), width=LARGURA_PNG)
+        self.blocos.append(fig.to_html(full_html=False, include_plotlyjs=False, default_width='100%'))
+    
+    def imagem(self, nome, png):
+        self.figuras += 1
+        arquivo = f"figuras/{self.figuras:02d}-{nome}.png"
+        with open(os.path.join(self.pasta, arquivo), 'wb') as saida:
+            saida.write(png)
+        self.blocos.append(f"<img src='{arquivo}' alt='{html.escape(nome)}'>")
+    
+    def gravar(self, plotlyjs):
+        caminho = os.path.join(self.pasta, 'index.html')
+        with open(caminho, 'w', encoding='utf-8') as saida:
+            saida.write(
+                f"<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'><title>{html.escape(self.titulo)}</title>"
+                f"<script src='{plotlyjs}'></script><style>{ESTILO}</style></head>"
+                f"<body><h1>{html.escape(self.titulo)}</h1>{''.join(self.blocos)}</body></html>"
+            )
+        return caminho
+
+
+def _secao_panorama(pagina, ano, versao, filtros):
+    
+    # Indicadores das páginas Geografia e Perfil para o recorte do escopo.
+    totais = load_cubo(ano, versao, medidas=('qtd', 'qtd_presentes', 'qtd_idade', 'soma_idade'), filtros=filtros)
+    total = totais['qtd'].sum()
+    por_genero = load_cubo(ano, versao, ('Desc_Genero',), filtros=filtros).set_index('Desc_Genero')['qtd']
+    
+    pagina.secao("Panorama")
+    pagina.indicadores({
+        "Total de inscritos": _numero(total),
+        "Taxa de presença": f"{totais['qtd_presentes'].sum() / total * 100:.1f}%",
+        "Média de idade": f"{media_cubo(totais, 'soma_idade', 'qtd_idade'):.0f} anos",
+        "Mulheres": f"{por_genero.get('Feminino', 0) / total * 100:.1f}%",
+        "Raça predominante": distribuicao_raca(ano, versao, filtros).iloc[0]['Raça'],
+    })
+
+
+def _secao_geografia(pagina, ano, versao, filtros, nacional):
+    
+    pagina.secao("Panorama geográfico do exame")
+    pagina.figura('inscritos-regiao', figura_inscritos_regiao(contagem_cubo(ano, versao, 'Desc_Regiao_Curso', 'Regiao', filtros)))
+    
+    pagina.figura('mapa-uf', figura_mapa_uf(contagem_cubo(ano, versao, 'UF_SIGLA', 'UF', filtros), geometria_uf(ALTURA_MAPA)))
+    
+    # A regressão compara as UFs entre si, então só faz sentido no relatório nacional.
+    if nacional:
+        df_analise, modelo = regressao_idh(load_idh_notes_data(ano, versao_edicao(DIRETORIO_IDH_NOTAS, ano)))
+        pagina.subtitulo("IDHM Educação e desempenho")
+        pagina.figura('regressao-idh', figura_regressao_idh(df_analise, ano))
+        pagina.indicadores({
+            "R²": f"{modelo.rsquared:.2%}",
+            "Impacto (coeficiente)": f"{modelo.params['IDHM Educação 2021']:.2f}",
+            "p-valor": f"{modelo.pvalues['IDHM Educação 2021']:.4f}",
+        })
+
+
+def _secao_perfil(pagina, ano, versao, filtros):
+    
+    pagina.secao("Perfil de gênero e raça")
+    raca_counts = distribuicao_raca(ano, versao, filtros)
+    pagina.imagem('mosaico-raca', png_waffle_raca(raca_counts))
+    pagina.legenda(" | ".join(f"{row['Raça']}: {row['Porcentagem']:.1f}%" for _, row in raca_counts.iterrows()))
+    pagina.figura('genero-regiao', figura_genero_regiao(ano, versao, filtros))
+    pagina.figura('genero-curso', figura_genero_curso(ano, versao, filtros))
+
+
+def _secao_municipio(pagina, ano, versao, municipio):
+    
+    indice = indice_municipios(ano, versao)
+    cidade = NOMES_MUNICIPIOS.get(municipio, f"{municipio} ({indice.at[municipio, 'UF_SIGLA']})")
+    df = load_data_jf(ano, versao, municipio)
+    
+    pagina.secao(f"Panorama do exame em {cidade}")
+    pagina.indicadores({
+        "Estudantes com nota válida": _numero(len(df)),
+        "Média geral da cidade": f"{df['NT_GER'].mean():.2f}",
+        "Cursos avaliados": df['CO_CURSO'].nunique(),
+    })
+    pagina.figura(f'{municipio}-tipo-ies', figura_media_tipo_ies(df))
+    pagina.figura(f'{municipio}-top-cursos', figura_top_cursos(ano, versao, municipio))
+    
+    histogramas, contagens = histogramas_municipio(ano, versao, municipio)
+    media, mediana, desvio = estatisticas_histograma(histogramas.iloc[0])
+    pagina.figura(f'{municipio}-distribuicao-notas', figura_histograma_notas(histogramas.iloc[0], contagens[0], cidade))
+    pagina.indicadores({"Média": f"{media:.2f}", "Mediana": f"{mediana:.2f}", "Desvio padrão": f"{desvio:.2f}"})
+    
+    df_ufjf = df[df['CATEGORIA_COMPARACAO'] == 'UFJF']
+    if len(df_ufjf) > 0:
+        pagina.subtitulo("Análise focada na UFJF")
+        pagina.indicadores({
+            "Média UFJF": f"{df_ufjf['NT_GER'].mean():.2f}",
+            "Alunos avaliados (UFJF)": _numero(len(df_ufjf)),
+            "Cursos avaliados (UFJF)": df_ufjf['CO_CURSO'].nunique(),
+        })
+        pagina.figura(f'{municipio}-ranking-ufjf', figura_ranking_ufjf(ano, versao, municipio))
+        pagina.figura(f'{municipio}-notas-cursos-ufjf', figura_notas_cursos_ufjf(df_ufjf, ano, versao, municipio))
+
+
+def exportar_escopo(ano, escopo, municipios, destino, png=False):
+    
+    # Relatório de um escopo (Brasil ou uma UF) numa edição: as mesmas seções das páginas,
+    # com os filtros da UF aplicados ao cubo, e a análise de cada município pedido que
+    # pertença ao escopo. Roda num processo do pool; devolve o caminho do index.html.
+    nacional = escopo == ESCOPO_NACIONAL
+    nome = "Brasil" if nacional else CO_UF_CURSO_LABELS[SIGLA_PARA_CODIGO_UF[escopo]]
+    filtros = () if nacional else (('Desc_UF_Curso', (nome,)),)
+    
+    pagina = PaginaRelatorio(os.path.join(destino, str(ano), escopo), f"ENADE {ano} - {nome}", png)
+    versao_cubo = versao_edicao(DIRETORIO_CUBO, ano)
+    if load_cubo(ano, versao_cubo, filtros=filtros)['qtd'].sum() == 0:
+        pagina.legenda("Nenhum estudante inscrito neste escopo.")
+        return pagina.gravar(f"../../{ARQUIVO_PLOTLYJS}")
+    
+    _secao_panorama(pagina, ano, versao_cubo, filtros)
+    _secao_geografia(pagina, ano, versao_cubo, filtros, nacional)
+    _secao_perfil(pagina, ano, versao_cubo, filtros)
+    
+    versao_notas = versao_edicao(DIRETORIO_NOTAS_MUNICIPIOS, ano)
+    indice = indice_municipios(ano, versao_notas)
+    for municipio in municipios:
+        if municipio in indice.index and (nacional or municipio // 100_000 == SIGLA_PARA_CODIGO_UF[escopo]):
+            _secao_municipio(pagina, ano, versao_notas, municipio)
+    
+    return pagina.gravar(f"../../{ARQUIVO_PLOTLYJS}")
+
+
+def gravar_indice(destino):
+    
+    # Página inicial com um link por edição e escopo já exportados na pasta, inclusive
+    # os de execuções anteriores com outras edições ou UFs.
+    paginas = sorted(glob.glob(os.path.join(destino, '*', '*', 'index.html')))
+    linhas = "".join(
+        f"<li><a href='{html.escape(os.path.relpath(pagina, destino))}'>{html.escape(os.path.relpath(os.path.dirname(pagina), destino))}</a></li>"
+        for pagina in paginas
+    )
+    caminho = os.path.join(destino, 'index.html')
+    with open(caminho, 'w', encoding='utf-8') as saida:
+        saida.write(
+            "<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'><title>Relatórios ENADE</title>"
+            f"<style>{ESTILO}</style></head><body><h1>Relatórios ENADE</h1><ul>{linhas}</ul></body></html>"
+        )
+    
+    return caminho
+
+
+def exportar_relatorios(anos, escopos=ESCOPOS, municipios=(CO_MUNIC_JUIZ_DE_FORA,), destino=DIRETORIO_RELATORIOS_ESTATICOS, png=False, workers=None):
+    
+    # Cada (edição, escopo) é uma etapa independente do grafo, distribuída no pool de
+    # processos do ETL; os dados vêm das mesmas tabelas mapeadas que o painel usa.
+    os.makedirs(destino, exist_ok=True)
+    with open(os.path.join(destino, ARQUIVO_PLOTLYJS), 'w', encoding='utf-8') as saida:
+        saida.write(get_plotlyjs())
+    
+    etapas = [
+        Etapa(f"relatorio:{ano}:{escopo}", partial(exportar_escopo, ano, escopo, tuple(municipios), destino, png))
+        for ano in anos for escopo in escopos
+    ]
+    inicio = time.perf_counter()
+    resultados, medidas = executar_grafo(etapas, workers=workers)
+    tempo_total = time.perf_counter() - inicio
+    
+    relatorio_grafo(etapas, medidas, tempo_total)
+    indice = gravar_indice(destino)
+    print(f"Relatórios estáticos gerados com sucesso ({len(etapas)} escopos, índice em {indice}).")
+    
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta as análises do painel como relatórios HTML estáticos, um por edição e escopo.")
+    parser.add_argument('--anos', nargs='+', type=int, default=None, help="Edições a exportar. Padrão: todas as edições do cubo.")
+    parser.add_argument('--escopos', nargs='+', choices=ESCOPOS, default=ESCOPOS, help=f"{ESCOPO_NACIONAL} e/ou siglas das UFs. Padrão: todos.")
+    parser.add_argument(
+        '--municipios', nargs='+', type=int, default=[CO_MUNIC_JUIZ_DE_FORA],
+        help="Códigos IBGE dos municípios com análise própria; cada um aparece no relatório nacional e no da sua UF."
+    )
+    parser.add_argument('--destino', default=DIRETORIO_RELATORIOS_ESTATICOS, help="Pasta de saída dos relatórios.")
+    parser.add_argument('--png', action='store_true', help="Grava também um PNG de cada gráfico (requer o pacote kaleido).")
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="Número de processos do pool; 1 executa tudo no processo atual. Padrão: número de CPUs."
+    )
+    args = parser.parse_args()
+    
+    if args.png and importlib.util.find_spec('kaleido') is None:
+        parser.error("--png requer o pacote kaleido (pip install kaleido).")
+    
+    exportar_relatorios(
+        args.anos or anos_disponiveis(DIRETORIO_CUBO), args.escopos, args.municipios,
+        args.destino, args.png, args.workers
+    )
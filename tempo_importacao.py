@@ -0,0 +1,137 @@
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Orçamento de tempo (s) das importações feitas no topo de cada página: é o que toda
+# sessão paga ao abrir a página logo após um deploy ou um novo contêiner.
+ORCAMENTO_PADRAO = 1.5
+REPETICOES_PADRAO = 3
+PACOTES_NO_RELATORIO = 5
+
+# Módulos do painel (figuras, acesso_dados...) ficam na raiz do repositório, ao lado deste script.
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def paginas_painel():
+    return ['Home.py'] + sorted(glob.glob('pages/*.py'))
+
+
+def _importacoes_modulo(caminho):
+    
+    with open(caminho, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read(), caminho)
+    
+    topo = [no for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom))]
+    adiadas = [no for no in ast.walk(arvore) if isinstance(no, (ast.Import, ast.ImportFrom)) and no not in topo]
+    
+    return topo, adiadas
+
+
+def _modulos_locais(no):
+    
+    # Módulos do próprio painel citados numa importação (os que têm um .py na raiz).
+    nomes = [alias.name for alias in no.names] if isinstance(no, ast.Import) else [no.module] if no.module and not no.level else []
+    return [nome for nome in nomes if os.path.exists(os.path.join(RAIZ, f"{nome.split('.')[0]}.py"))]
+
+
+def importacoes_pagina(caminho):
+    
+    # Separa as importações do topo do módulo (feitas ao abrir a página) das adiadas,
+    # feitas dentro de blocos e funções só quando o widget que as usa é exibido. Os
+    # módulos locais importados pela página são seguidos: as importações adiadas dentro
+    # das funções deles (statsmodels e pywaffle em figuras.py) também são da página.
+    topo, adiadas = _importacoes_modulo(caminho)
+    
+    # Primeiro os módulos alcançados pelo topo; um módulo local alcançado só por uma
+    # importação adiada entra inteiro nas adiadas.
+    visitados = set()
+    for eh_topo in (True, False):
+        pendentes = list(topo if eh_topo else adiadas)
+        while pendentes:
+            for nome in _modulos_locais(pendentes.pop()):
+                modulo = nome.split('.')[0]
+                if modulo in visitados:
+                    continue
+                visitados.add(modulo)
+                topo_modulo, adiadas_modulo = _importacoes_modulo(os.path.join(RAIZ, f"{modulo}.py"))
+                adiadas.extend(adiadas_modulo if eh_topo else topo_modulo + adiadas_modulo)
+                pendentes.extend(topo_modulo if eh_topo else topo_modulo + adiadas_modulo)
+    
+    return [ast.unparse(no) for no in topo], [ast.unparse(no) for no in adiadas]
+
+
+def _medir_importacao(codigo):
+    
+    # Um interpretador novo por medição, com -X importtime: só os pacotes de primeiro
+    # nível (sem recuo no nome) entram na soma, pois o tempo acumulado já inclui os filhos.
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], capture_output=True, text=True, check=True)
+    pacotes = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha.split('|')
+        if not nome[1:].startswith(' '):
+            pacotes[nome.strip()] = int(acumulado) / 1e6
+    
+    return pacotes
+
+
+def medir_pagina(caminho, repeticoes=REPETICOES_PADRAO):
+    
+    # Módulos que o interpretador carrega sozinho (site, encodings...) não são da página.
+    inicializacao = set(_medir_importacao('pass'))
+    topo, adiadas = importacoes_pagina(caminho)
+    medicoes = [_medir_importacao('\n'.join(topo)) for _ in range(repeticoes)]
+    medicoes = [{nome: segundos for nome, segundos in pacotes.items() if nome not in inicializacao} for pacotes in medicoes]
+    total = statistics.median(sum(pacotes.values()) for pacotes in medicoes)
+    pacotes = medicoes[-1]
+    
+    # Custo extra das importações adiadas, pago só por quem chega ao widget que as usa.
+    adiado = None
+    if adiadas:
+        com_adiadas = [
+            sum(segundos for nome, segundos in _medir_importacao('\n'.join(topo + adiadas)).items() if nome not in inicializacao)
+            for _ in range(repeticoes)
+        ]
+        adiado = max(statistics.median(com_adiadas) - total, 0.0)
+    
+    return {
+        'segundos_topo': round(total, 3),
+        'segundos_adiados': None if adiado is None else round(adiado, 3),
+        'importacoes_adiadas': adiadas,
+        'pacotes_mais_lentos': dict(sorted(pacotes.items(), key=lambda item: -item[1])[:PACOTES_NO_RELATORIO]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação de cada página do painel.")
+    parser.add_argument('paginas', nargs='*', help="Páginas a medir. Padrão: Home.py e pages/*.py.")
+    parser.add_argument('--orcamento', type=float, default=ORCAMENTO_PADRAO, help="Tempo máximo (s) das importações do topo de cada página.")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO, help="Medições por página (vale a mediana).")
+    parser.add_argument('--saida', default=None, help="Grava o relatório em JSON.")
+    args = parser.parse_args()
+    
+    relatorio = {pagina: medir_pagina(pagina, args.repeticoes) for pagina in args.paginas or paginas_painel()}
+    
+    acima = []
+    for pagina, medida in relatorio.items():
+        marcador = "  <- acima do orçamento" if medida['segundos_topo'] > args.orcamento else ""
+        adiado = f", adiadas +{medida['segundos_adiados']:.2f}s" if medida['segundos_adiados'] is not None else ""
+        print(f"{pagina:<24} {medida['segundos_topo']:6.2f}s{adiado}{marcador}")
+        for pacote, segundos in medida['pacotes_mais_lentos'].items():
+            print(f"    {pacote:<30} {segundos:6.2f}s")
+        if marcador:
+            acima.append(pagina)
+    
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump({'orcamento': args.orcamento, 'paginas': relatorio}, arquivo, indent=2, ensure_ascii=False)
+        print(f"Relatório de importação gravado com sucesso ({args.saida}).")
+    
+    if acima:
+        sys.exit(1)
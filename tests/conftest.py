@@ -0,0 +1,43 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import pytest
+
+from streamlit.logger import set_log_level
+
+# Os módulos do projeto ficam na raiz do repositório, fora de um pacote.
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Fora do 'streamlit run' os caches do painel avisam, a cada chamada, que não há sessão.
+set_log_level('error')
+
+from microdados_sinteticos import gerar_idh_sintetico, gerar_microdados_sinteticos
+from tratamento_dados import ANO_PADRAO
+
+LINHAS_TESTE = 3000
+
+
+@pytest.fixture(scope='session')
+def microdados_sinteticos(tmp_path_factory):
+    
+    # Gerados uma vez por sessão; cada teste trabalha sobre uma cópia.
+    pasta = tmp_path_factory.mktemp('sinteticos')
+    with contextlib.redirect_stdout(io.StringIO()):
+        gerar_microdados_sinteticos(LINHAS_TESTE, pasta, ANO_PADRAO)
+        gerar_idh_sintetico(pasta)
+    
+    return pasta
+
+
+@pytest.fixture
+def pasta_trabalho(microdados_sinteticos, tmp_path, monkeypatch):
+    
+    # O ETL e o painel usam caminhos relativos (data/...), então cada teste roda a partir
+    # de uma pasta própria com os microdados sintéticos.
+    shutil.copytree(microdados_sinteticos, tmp_path, dirs_exist_ok=True)
+    monkeypatch.chdir(tmp_path)
+    
+    return tmp_path
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import numpy as np
+import pytest
+
+import acesso_dados
+import tratamento_dados
+from acesso_dados import DIRETORIO_CUBO, linhas_filtradas, quadro_edicao, versao_edicao
+from tratamento_dados import ANO_PADRAO
+
+FILTROS = [
+    (('Desc_Regiao_Curso', ('Sudeste',)),),
+    (('Desc_Regiao_Curso', ('Sudeste', 'Sul')), ('Desc_Genero', ('Feminino',))),
+    (('Desc_Regiao_Curso', ('Norte', 'Nordeste')), ('Faixa_Idade', ('21-25', '26-30')), ('Presenca', ('Estudante ausente',))),
+]
+
+
+@pytest.fixture
+def cubo(pasta_trabalho):
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        tratamento_dados.executar_etl(workers=1)
+    # Pastas de teste diferentes podem repetir a versão (tamanho e data) do cubo.
+    acesso_dados.tabela_edicao.clear()
+    acesso_dados.bitmaps_cubo.clear()
+    versao = versao_edicao(DIRETORIO_CUBO, ANO_PADRAO)
+    
+    return versao, quadro_edicao(DIRETORIO_CUBO, ANO_PADRAO, versao)
+
+
+@pytest.mark.parametrize('filtros', FILTROS)
+def test_bitmaps_selecionam_as_mesmas_linhas_que_o_filtro_direto(cubo, filtros):
+    
+    versao, df = cubo
+    mascara = np.ones(len(df), dtype=bool)
+    for dimensao, categorias in filtros:
+        mascara &= df[dimensao].isin(categorias).to_numpy()
+    
+    linhas = linhas_filtradas(ANO_PADRAO, versao, filtros)
+    
+    assert len(linhas) > 0
+    np.testing.assert_array_equal(linhas, np.flatnonzero(mascara))
+
+
+def test_sem_filtros_e_categoria_ausente(cubo):
+    
+    versao, _ = cubo
+    
+    assert linhas_filtradas(ANO_PADRAO, versao, ()) is None
+    assert len(linhas_filtradas(ANO_PADRAO, versao, (('Desc_Genero', ('Categoria de outra edição',)),))) == 0
@@ -0,0 +1,61 @@
+import json
+import os
+import numpy as np
+import pytest
+
+from conftest import RAIZ
+from geometrias import ARQUIVO_GEOMETRIAS_UF, NIVEIS_SIMPLIFICACAO, _simplificar_anel, _simplificar_linha
+from mapeamentos import CODIGO_UF_PARA_SIGLA
+
+
+def distancia_reta(ponto, a, b):
+    return abs((b[0] - a[0]) * (ponto[1] - a[1]) - (b[1] - a[1]) * (ponto[0] - a[0])) / np.hypot(*(b - a))
+
+
+def test_pontos_colineares_viram_um_segmento():
+    
+    pontos = np.column_stack([np.linspace(0, 10, 50), np.linspace(0, 5, 50)])
+    
+    np.testing.assert_array_equal(_simplificar_linha(pontos, 0.001), pontos[[0, -1]])
+
+
+@pytest.mark.parametrize('tolerancia', [0.05, 0.2, 1.0])
+def test_pontos_descartados_ficam_dentro_da_tolerancia(tolerancia):
+    
+    rng = np.random.default_rng(0)
+    pontos = np.column_stack([np.arange(200) / 20, np.cumsum(rng.normal(0, 0.1, 200))])
+    simplificado = _simplificar_linha(pontos, tolerancia)
+    mantidos = np.flatnonzero((pontos[:, None] == simplificado[None]).all(axis=2).any(axis=1))
+    
+    assert mantidos[0] == 0 and mantidos[-1] == len(pontos) - 1
+    for inicio, fim in zip(mantidos[:-1], mantidos[1:]):
+        for indice in range(inicio + 1, fim):
+            assert distancia_reta(pontos[indice], pontos[inicio], pontos[fim]) <= tolerancia
+
+
+def test_anel_continua_fechado_e_ilhas_pequenas_somem():
+    
+    angulos = np.linspace(0, 2 * np.pi, 100)
+    anel = np.column_stack([np.cos(angulos), np.sin(angulos)]).tolist()
+    simplificado = _simplificar_anel(anel, 0.01)
+    
+    assert simplificado[0] == simplificado[-1]
+    assert 4 <= len(simplificado) < len(anel)
+    assert _simplificar_anel((np.array(anel) * 0.001).tolist(), 0.01) is None
+
+
+def test_geometrias_versionadas_cobrem_todas_as_ufs():
+    
+    # As páginas ligam o cubo às geometrias pela sigla da UF (featureidkey='id').
+    with open(os.path.join(RAIZ, ARQUIVO_GEOMETRIAS_UF), encoding='utf-8') as arquivo:
+        niveis = json.load(arquivo)['niveis']
+    
+    assert list(niveis) == list(NIVEIS_SIMPLIFICACAO)
+    pontos = []
+    for geojson in niveis.values():
+        assert sorted(feature['id'] for feature in geojson['features']) == sorted(CODIGO_UF_PARA_SIGLA.values())
+        pontos.append(sum(
+            len(anel) for feature in geojson['features']
+            for poligono in feature['geometry']['coordinates'] for anel in poligono
+        ))
+    assert pontos == sorted(pontos, reverse=True)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from mapeamentos import CO_CATEGAD_LABELS, CO_UF_CURSO_LABELS, GENDER_LABELS, ROTULO_NAO_INFORMADO, TABELA_CATEGAD, TABELA_GENERO, TABELA_PRESENCA, TABELA_UF_CURSO, TP_PR_GER_LABELS, decodificar
+
+
+def esperado(valores, rotulos, ausente=ROTULO_NAO_INFORMADO):
+    return [rotulos.get(valor, ausente) for valor in valores]
+
+
+def test_codigos_inteiros_com_desconhecidos_e_nulos():
+    
+    valores = pd.Series([31, 35.0, 99, -1, 35.5, np.nan, 11], index=list('abcdefg'))
+    decodificado = decodificar(valores, TABELA_UF_CURSO)
+    
+    assert decodificado.tolist() == esperado([31, 35, 99, -1, 35.5, None, 11], CO_UF_CURSO_LABELS)
+    assert decodificado.index.tolist() == list('abcdefg')
+    assert decodificado.dtype == TABELA_UF_CURSO.dtype
+
+
+def test_codigos_texto():
+    
+    valores = pd.Series(['M', 'F', '9', 'X', None])
+    
+    assert decodificar(valores, TABELA_GENERO).tolist() == esperado(valores, GENDER_LABELS)
+
+
+def test_rotulos_repetidos_viram_uma_categoria():
+    
+    decodificado = decodificar(pd.Series(list(TP_PR_GER_LABELS)), TABELA_PRESENCA)
+    
+    assert decodificado.tolist() == list(TP_PR_GER_LABELS.values())
+    assert list(decodificado.cat.categories).count("Não se aplica") == 1
+
+
+def test_tabela_sem_rotulo_ausente_devolve_nulo():
+    
+    decodificado = decodificar(pd.Series([1, 6, 8]), TABELA_CATEGAD)
+    
+    assert decodificado.iloc[[0, 2]].tolist() == [CO_CATEGAD_LABELS[1], CO_CATEGAD_LABELS[8]]
+    assert pd.isna(decodificado.iloc[1])
@@ -0,0 +1,66 @@
+import pytest
+from functools import partial
+
+from pipeline import Etapa, caminho_critico, executar_grafo, ordenar_etapas
+
+
+def constante(valor):
+    return valor
+
+
+def somar(*valores):
+    return sum(valores)
+
+
+def nomes(etapas):
+    return [etapa.nome for etapa in etapas]
+
+
+def grafo_losango():
+    
+    # a -> (b, c) -> d, com as etapas fora de ordem na lista; as funções precisam ser
+    # serializáveis para rodar no pool de processos.
+    return [
+        Etapa('d', somar, ('b', 'c')),
+        Etapa('b', somar, ('a',)),
+        Etapa('c', somar, ('a', 'a')),
+        Etapa('a', partial(constante, 1)),
+    ]
+
+
+def test_ordem_coloca_dependencias_antes():
+    
+    ordem = nomes(ordenar_etapas(grafo_losango()))
+    
+    assert sorted(ordem) == ['a', 'b', 'c', 'd']
+    for etapa in grafo_losango():
+        for dependencia in etapa.dependencias:
+            assert ordem.index(dependencia) < ordem.index(etapa.nome)
+
+
+@pytest.mark.parametrize('etapas, mensagem', [
+    ([Etapa('a', somar), Etapa('a', somar)], "nomes repetidos"),
+    ([Etapa('a', somar, ('x',))], "inexistentes: x"),
+    ([Etapa('a', somar, ('b',)), Etapa('b', somar, ('a',))], "ciclo"),
+])
+def test_grafo_invalido(etapas, mensagem):
+    
+    with pytest.raises(ValueError, match=mensagem):
+        ordenar_etapas(etapas)
+
+
+def test_caminho_critico_segue_o_ramo_mais_lento():
+    
+    duracoes = {'a': 1.0, 'b': 5.0, 'c': 2.0, 'd': 1.0}
+    
+    assert caminho_critico(grafo_losango(), duracoes) == (['a', 'b', 'd'], 7.0)
+    assert caminho_critico([], {}) == ([], 0.0)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_executar_grafo_devolve_apenas_as_etapas_finais(workers):
+    
+    resultados, medidas = executar_grafo(grafo_losango(), workers=workers)
+    
+    assert resultados == {'d': 3}
+    assert set(medidas) == {'a', 'b', 'c', 'd'}
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+import reamostragem
+from reamostragem import medias_bootstrap, ranking_bootstrap
+
+
+def amostra(medias, tamanho=200, desvio=10.0, semente=0):
+    
+    rng = np.random.default_rng(semente)
+    grupos = np.repeat([f"curso {i}" for i in range(len(medias))], tamanho)
+    valores = rng.normal(np.repeat(medias, tamanho), desvio)
+    
+    return valores, grupos
+
+
+def test_grupos_separados_tem_posicao_estavel():
+    
+    valores, grupos = amostra([40, 60, 80, 20])
+    ranking = ranking_bootstrap(valores, grupos, topo=2, reamostragens=500)
+    
+    assert ranking['grupo'].tolist() == ['curso 2', 'curso 1', 'curso 0', 'curso 3']
+    assert ranking['posicao'].tolist() == [1, 2, 3, 4]
+    assert (ranking['posicao_melhor'] == ranking['posicao']).all()
+    assert (ranking['posicao_pior'] == ranking['posicao']).all()
+    assert ranking['prob_topo'].tolist() == [1.0, 1.0, 0.0, 0.0]
+
+
+def test_media_e_intervalo_de_confianca():
+    
+    valores, grupos = amostra([50, 52], tamanho=2000)
+    ranking = ranking_bootstrap(valores, grupos, reamostragens=2000).set_index('grupo')
+    observadas = pd.Series(valores).groupby(grupos).agg(['mean', 'count', 'std']).loc[ranking.index]
+    
+    np.testing.assert_allclose(ranking['media'], observadas['mean'])
+    assert (ranking['qtd'] == observadas['count']).all()
+    assert ((ranking['ic_inferior'] < ranking['media']) & (ranking['media'] < ranking['ic_superior'])).all()
+    
+    # Com muitos alunos o intervalo se aproxima do normal: média ± 1,96 erros padrão.
+    amplitude_normal = 2 * 1.96 * observadas['std'] / np.sqrt(observadas['count'])
+    np.testing.assert_allclose(ranking['ic_superior'] - ranking['ic_inferior'], amplitude_normal, rtol=0.1)
+
+
+def test_lotes_nao_mudam_as_replicas(monkeypatch):
+    
+    valores, grupos = amostra([40, 45, 50], tamanho=50)
+    _, inteiras = medias_bootstrap(valores, grupos, reamostragens=300, semente=3)
+    
+    # Lotes de poucas réplicas sorteiam a mesma sequência que um lote único.
+    monkeypatch.setattr(reamostragem, 'SORTEIOS_POR_LOTE', len(valores) * 7)
+    _, em_lotes = medias_bootstrap(valores, grupos, reamostragens=300, semente=3)
+    
+    np.testing.assert_array_equal(em_lotes, inteiras)
+
+
+def test_semente_define_as_replicas():
+    
+    valores, grupos = amostra([50, 51, 52], tamanho=30)
+    primeiro = ranking_bootstrap(valores, grupos, semente=0)
+    
+    pd.testing.assert_frame_equal(ranking_bootstrap(valores, grupos, semente=0), primeiro)
+    assert not ranking_bootstrap(valores, grupos, semente=1)['ic_inferior'].equals(primeiro['ic_inferior'])
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import tratamento_dados
+from acesso_dados import ler_edicao, versao_edicao
+from conftest import LINHAS_TESTE
+from manifesto import carregar_manifesto
+from microdados_sinteticos import gerar_idh_sintetico
+from tratamento_dados import ANO_PADRAO, ARQUIVO_HISTOGRAMAS_NOTAS, ARQUIVO_INDICE_MUNICIPIOS, ARQUIVO_PARTE_ARROW, caminho_edicao
+
+
+def executar_silencioso(funcao, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcao(*args, **kwargs)
+
+
+def ler_arrow(diretorio, arquivo=ARQUIVO_PARTE_ARROW, ano=ANO_PADRAO):
+    with pa.memory_map(os.path.join(caminho_edicao(diretorio, ano), arquivo), 'r') as origem:
+        return pa.ipc.open_file(origem).read_all().to_pandas()
+
+
+def ordenado(df, colunas=None):
+    
+    # A ordem das linhas de cada saída depende de como os blocos chegaram; o conteúdo não.
+    colunas = list(df.columns) if colunas is None else colunas
+    return df.sort_values(colunas, kind='stable').reset_index(drop=True)
+
+
+def saidas_edicao(ano=ANO_PADRAO):
+    
+    return {
+        'dados_gerais_estudantes': ordenado(ler_edicao(tratamento_dados.DIRETORIO_SAIDA_DADOS_GERAIS, ano)),
+        'cubo_estudantes': ordenado(ler_arrow(tratamento_dados.DIRETORIO_SAIDA_CUBO, ano=ano), tratamento_dados.DIMENSOES_CUBO),
+        'idh_notas_uf': ler_arrow(tratamento_dados.DIRETORIO_SAIDA_IDH_NOTAS, ano=ano),
+        'notas_municipios': ler_arrow(tratamento_dados.DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ano=ano),
+        'indice_municipios': ler_arrow(tratamento_dados.DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ARQUIVO_INDICE_MUNICIPIOS, ano),
+        'histogramas_notas': ler_arrow(tratamento_dados.DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ARQUIVO_HISTOGRAMAS_NOTAS, ano),
+    }
+
+
+def etapas_pendentes():
+    
+    grafo, _ = executar_silencioso(tratamento_dados.montar_grafo_etl, manifesto=carregar_manifesto())
+    return {etapa.nome for etapa in grafo}
+
+
+def versoes_saidas():
+    
+    diretorios = [tratamento_dados.DIRETORIO_SAIDA_CUBO, tratamento_dados.DIRETORIO_SAIDA_IDH_NOTAS, tratamento_dados.DIRETORIO_SAIDA_NOTAS_MUNICIPIOS]
+    return {diretorio: versao_edicao(diretorio, ANO_PADRAO) for diretorio in diretorios}
+
+
+def test_segunda_execucao_ignora_todas_as_etapas(pasta_trabalho):
+    
+    executar_silencioso(tratamento_dados.executar_etl, workers=1)
+    versoes = versoes_saidas()
+    
+    assert etapas_pendentes() == set()
+    executar_silencioso(tratamento_dados.executar_etl, workers=1)
+    assert versoes_saidas() == versoes
+
+
+def test_idh_alterado_refaz_apenas_as_saidas_com_idh(pasta_trabalho):
+    
+    executar_silencioso(tratamento_dados.executar_etl, workers=1)
+    gerar_idh_sintetico(pasta_trabalho, semente=1)
+    
+    # Os microdados vêm do cache, sem reler os arquivos arq*.
+    assert etapas_pendentes() == {'idh', f"microdados:{ANO_PADRAO}", f"idh_notas_uf:{ANO_PADRAO}"}
+
+
+@pytest.mark.parametrize('chunksize', [LINHAS_TESTE // 7, LINHAS_TESTE * 2])
+def test_modo_em_blocos_grava_as_mesmas_saidas(pasta_trabalho, chunksize):
+    
+    executar_silencioso(tratamento_dados.executar_etl, workers=1)
+    normais = saidas_edicao()
+    assert len(normais['dados_gerais_estudantes']) == LINHAS_TESTE
+    versao = versao_edicao(tratamento_dados.DIRETORIO_SAIDA_CUBO, ANO_PADRAO)
+    
+    executar_silencioso(tratamento_dados.processar_em_blocos, chunksize)
+    em_blocos = saidas_edicao()
+    assert versao_edicao(tratamento_dados.DIRETORIO_SAIDA_CUBO, ANO_PADRAO) != versao
+    
+    for nome, esperado in normais.items():
+        pd.testing.assert_frame_equal(em_blocos[nome], esperado, obj=nome)
@@ -1,6 +1,27 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
 import pandas as pd
-from mapeamentos import FAIXA_ETARIA_BINS, FAIXA_ETARIA_LABELS, QE_I19_LABELS, QE_I02_LABELS, GENDER_LABELS, REGIONS_LABELS, TP_PR_GER_LABELS, CO_UF_CURSO_LABELS, CO_REGIAO_CURSO_LABELS, CO_CATEGAD_LABELS, CO_MODALIDADE_LABELS, CO_GRUPO_LABELS, CODIGO_UF_PARA_SIGLA
-import matplotlib.pyplot as plt
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from contextlib import ExitStack
+from datetime import datetime
+from functools import partial
+from itertools import zip_longest
+import esquema_microdados
+import mapeamentos
+from esquema_microdados import TIPOS_PANDAS_DE_ARROW, separador_decimal, tipos_arrow, tipos_pandas
+from manifesto import carregar_manifesto, etapa_atualizada, registrar_etapa, salvar_manifesto
+from pipeline import Etapa, executar_grafo, relatorio_execucao, relatorio_grafo
+from mapeamentos import FAIXA_ETARIA_BINS, FAIXA_ETARIA_LABELS, CO_UF_CURSO_LABELS, CO_IES_UFJF, TABELA_UF_CURSO, TABELA_UF_SIGLA, TABELA_REGIAO_CURSO, TABELA_RACA, TABELA_GENERO, TABELA_PRESENCA, TABELA_CATEGAD, TABELA_MODALIDADE, TABELA_GRUPO, decodificar
+
+ANO_PADRAO = 2023
+DIRETORIO_MICRODADOS = "data/raw/enade"
 
 ARQUIVO_INFO_GERAL = "data/raw/enade/microdados2023_arq1.txt"
 ARQUIVO_INFO_ESTUDANTES = "data/raw/enade/microdados2023_arq2.txt"
@@ -10,32 +31,424 @@ ARQUIVO_INFO_IDADE = "data/raw/enade/microdados2023_arq6.txt"
 ARQUIVO_INFO_RACA = "data/raw/enade/microdados2023_arq8.txt"
 ARQUIVO_IDH = "data/processed/idh_atlasbrasil.xlsx"
 
+# Cada saída é um dataset particionado no estilo hive, com uma pasta NU_ANO=<ano>
+# por edição; assim as edições convivem lado a lado e são lidas com filtros.
+DIRETORIO_SAIDA_DADOS_GERAIS = "data/processed/dados_gerais_estudantes"
+DIRETORIO_SAIDA_IDH_NOTAS = "data/processed/idh_notas_uf"
+DIRETORIO_SAIDA_NOTAS_MUNICIPIOS = "data/processed/notas_municipios"
+DIRETORIO_SAIDA_CUBO = "data/processed/cubo_estudantes"
+ARQUIVO_PARTE = "parte-0.parquet"
+
+# Saídas lidas pelo painel são gravadas em Arrow IPC sem compressão: o painel mapeia o
+# arquivo em memória e todas as sessões compartilham as mesmas páginas, sem cópias.
+ARQUIVO_PARTE_ARROW = "parte-0.arrow"
+
+# As notas por município ficam ordenadas por CO_MUNIC_CURSO, ao lado de um índice com a
+# faixa de linhas (início, quantidade) de cada município: ler uma cidade é fatiar a tabela.
+ORDEM_NOTAS_MUNICIPIOS = ['CO_MUNIC_CURSO', 'CO_IES', 'CO_CURSO']
+ARQUIVO_INDICE_MUNICIPIOS = "indice-municipios.arrow"
+
+# Histogramas de NT_GER (faixas de 1 ponto, de 0 a 100) com quantidade, soma, soma dos
+# quadrados e mediana, por município, por IES no município e por curso. Ficam na mesma
+# ordem das notas, e o índice guarda também a faixa de linhas de cada município.
+ARQUIVO_HISTOGRAMAS_NOTAS = "histogramas-notas.arrow"
+FAIXAS_HISTOGRAMA = 100
+NIVEIS_HISTOGRAMA = {'municipio': [], 'ies': ['CO_IES'], 'curso': ['CO_IES', 'CO_CURSO']}
+
+# A base de estudantes ainda é dividida por região e, dentro de cada arquivo, ordenada por
+# UF e curso em row groups pequenos: as estatísticas de cada row group permitem que um
+# filtro por UF ou curso pule o que não interessa.
+PARTICAO_DADOS_GERAIS = 'CO_REGIAO_CURSO'
+ORDEM_DADOS_GERAIS = ['CO_UF_CURSO', 'CO_GRUPO']
+LINHAS_POR_ROW_GROUP = 50_000
+
+# Cópia tipada das colunas de microdados usadas pelo ETL; evita reprocessar os CSVs
+# quando só mapeamentos, IDH ou o código das saídas mudaram.
+ARQUIVO_CACHE_MICRODADOS = "data/interim/microdados2023.parquet"
+
+# Um relatório JSON por execução do ETL (tempo, CPU, memória, linhas e bytes por etapa).
+DIRETORIO_RELATORIOS = "data/interim/relatorios_etl"
+
+# Número de linhas lidas por vez de cada arquivo no modo em blocos.
+TAMANHO_BLOCO_PADRAO = 500_000
+
+# 'pyarrow' usa o leitor CSV multithread do Arrow; 'pandas' usa o parser C do pandas.
+ENGINES_LEITURA = ('pyarrow', 'pandas')
+ENGINE_PADRAO = 'pyarrow'
+
+
+COLUNAS_POR_ARQUIVO = {
+    'arq1': ['CO_IES', 'CO_CURSO', 'CO_MUNIC_CURSO', 'CO_UF_CURSO', 'CO_REGIAO_CURSO', 'CO_GRUPO', 'CO_CATEGAD', 'CO_MODALIDADE'],
+    'arq3': ['TP_PR_GER', 'NT_GER'],
+    'arq5': ['TP_SEXO'],
+    'arq6': ['NU_IDADE'],
+    'arq8': ['QE_I02'],
+}
+
+
+def arquivo_microdados(ano, arq):
+    
+    return f"{DIRETORIO_MICRODADOS}/microdados{ano}_{arq}.txt"
+
+
+def colunas_microdados(ano=ANO_PADRAO):
+    
+    return {arquivo_microdados(ano, arq): colunas for arq, colunas in COLUNAS_POR_ARQUIVO.items()}
+
+
+def caminho_edicao(diretorio, ano):
+    
+    return os.path.join(diretorio, f"NU_ANO={ano}")
+
+
+def caminho_cache_microdados(ano):
+    
+    return ARQUIVO_CACHE_MICRODADOS.replace(str(ANO_PADRAO), str(ano))
+
+
+def _garantir_diretorio(caminho):
+    
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+
+COLUNAS_MICRODADOS = colunas_microdados(ANO_PADRAO)
+
+COLUNAS_DADOS_GERAIS = ['CO_IES', 'CO_CURSO', 'CO_MUNIC_CURSO', 'CO_UF_CURSO', 'CO_REGIAO_CURSO', 'CO_GRUPO', 'TP_PR_GER', 'NT_GER', 'TP_SEXO', 'NU_IDADE', 'QE_I02']
+COLUNAS_CURSO_MUNICIPIOS = ['CO_CURSO', 'CO_MUNIC_CURSO', 'CO_CATEGAD', 'CO_MODALIDADE', 'CO_GRUPO', 'CO_IES']
+
+# Colunas do cache de microdados lidas por cada saída no grafo do ETL.
+COLUNAS_SAIDA = {
+    'dados_gerais_estudantes': COLUNAS_DADOS_GERAIS,
+    'idh_notas_uf': ['CO_UF_CURSO', 'NT_GER'],
+    'notas_municipios': ['NT_GER'] + COLUNAS_CURSO_MUNICIPIOS,
+}
+
+# Layout compacto da base de estudantes: rótulos como categorias (dicionário no parquet)
+# e códigos com a menor largura inteira que comporta o domínio.
+COLUNAS_CATEGORICAS = ['TP_SEXO', 'QE_I02', 'Desc_UF_Curso', 'UF_SIGLA', 'Desc_Regiao_Curso', 'Desc_Raca', 'Desc_Genero', 'Presenca', 'NOME_CURSO']
+TIPOS_COMPACTOS = {'CO_UF_CURSO': 'uint8', 'CO_REGIAO_CURSO': 'uint8', 'NU_IDADE': 'uint8', 'CO_GRUPO': 'uint16'}
+
+COLUNAS_CATEGORICAS_MUNICIPIOS = ['TIPO_IES', 'MODALIDADE', 'NOME_CURSO', 'CATEGORIA_COMPARACAO']
+CATEGORIAS_COMPARACAO = ['Outras IES', 'UFJF']
+TIPOS_COMPACTOS_MUNICIPIOS = {'CO_CURSO': 'uint32', 'CO_IES': 'uint32', 'CO_MUNIC_CURSO': 'uint32', 'CO_CATEGAD': 'uint16', 'CO_MODALIDADE': 'uint8', 'CO_GRUPO': 'uint16'}
+
+# Cubo de agregados lido pelas páginas: uma linha por combinação observada das dimensões
+# categóricas, com somas que permitem recompor contagens, médias e desvios de qualquer recorte.
+DIMENSOES_CUBO = ['CO_UF_CURSO', 'UF_SIGLA', 'Desc_UF_Curso', 'Desc_Regiao_Curso', 'Desc_Genero', 'Desc_Raca', 'Faixa_Idade', 'NOME_CURSO', 'Presenca']
+MEDIDAS_CUBO = ['qtd', 'qtd_presentes', 'qtd_idade', 'soma_idade', 'qtd_notas', 'soma_nota', 'soma_nota_quadrado']
+
+
+def _colunas_por_arquivo(colunas):
+    
+    return {
+        arquivo: [col for col in cols if col in colunas]
+        for arquivo, cols in COLUNAS_MICRODADOS.items()
+        if any(col in colunas for col in cols)
+    }
+
+
+def _ler_csv_pandas(arquivo, colunas, chunksize=None):
+    
+    # Os tipos vêm do esquema: notas já saem float32 e códigos como inteiros pequenos.
+    return pd.read_csv(
+        arquivo, sep=';', encoding='latin1', usecols=colunas,
+        dtype=tipos_pandas(arquivo, colunas), decimal=separador_decimal(arquivo, colunas),
+        chunksize=chunksize
+    )
+
+
+def _opcoes_csv_arrow(arquivo, colunas, tamanho_bloco=None):
+    
+    # O Arrow transcodifica de latin1 para UTF-8 enquanto lê e já converte a vírgula decimal.
+    opcoes_leitura = pacsv.ReadOptions(encoding='latin1', use_threads=True)
+    if tamanho_bloco is not None:
+        opcoes_leitura.block_size = tamanho_bloco
+    
+    opcoes_parse = pacsv.ParseOptions(delimiter=';')
+    opcoes_conversao = pacsv.ConvertOptions(
+        include_columns=colunas,
+        column_types=tipos_arrow(arquivo, colunas),
+        decimal_point=separador_decimal(arquivo, colunas),
+        strings_can_be_null=True
+    )
+    
+    return opcoes_leitura, opcoes_parse, opcoes_conversao
+
+
+def _ler_csv_arrow(arquivo, colunas):
+    
+    opcoes_leitura, opcoes_parse, opcoes_conversao = _opcoes_csv_arrow(arquivo, colunas)
+    tabela = pacsv.read_csv(arquivo, read_options=opcoes_leitura, parse_options=opcoes_parse, convert_options=opcoes_conversao)
+    
+    return tabela.select(colunas).to_pandas(types_mapper=TIPOS_PANDAS_DE_ARROW.get)
+
+
+def _iterar_csv_arrow(arquivo, colunas, chunksize):
+    
+    # O leitor em streaming do Arrow devolve lotes de tamanho variável (em bytes);
+    # os lotes são reagrupados em blocos de exatamente chunksize linhas para que
+    # os arquivos arq* continuem andando juntos.
+    opcoes = _opcoes_csv_arrow(arquivo, colunas, tamanho_bloco=16 << 20)
+    leitor = pacsv.open_csv(arquivo, read_options=opcoes[0], parse_options=opcoes[1], convert_options=opcoes[2])
+    
+    pendentes = []
+    linhas_pendentes = 0
+    for lote in leitor:
+        pendentes.append(lote)
+        linhas_pendentes += lote.num_rows
+        if linhas_pendentes < chunksize:
+            continue
+    
+        tabela = pa.Table.from_batches(pendentes)
+        inicio = 0
+        while linhas_pendentes - inicio >= chunksize:
+            yield tabela.slice(inicio, chunksize).select(colunas).to_pandas(types_mapper=TIPOS_PANDAS_DE_ARROW.get)
+            inicio += chunksize
+        pendentes = tabela.slice(inicio).to_batches()
+        linhas_pendentes -= inicio
+    
+    if linhas_pendentes:
+        yield pa.Table.from_batches(pendentes).select(colunas).to_pandas(types_mapper=TIPOS_PANDAS_DE_ARROW.get)
+
+
+def _ler_csv_microdados(arquivo, colunas, engine=ENGINE_PADRAO):
+    
+    if engine == 'pyarrow':
+        return _ler_csv_arrow(arquivo, colunas)
+    if engine == 'pandas':
+        return _ler_csv_pandas(arquivo, colunas)
+    raise ValueError(f"Engine de leitura desconhecida: {engine}. Opções: {', '.join(ENGINES_LEITURA)}.")
+
+
+def _iterar_csv_microdados(pilha, arquivo, colunas, chunksize, engine=ENGINE_PADRAO):
+    
+    if engine == 'pyarrow':
+        return _iterar_csv_arrow(arquivo, colunas, chunksize)
+    if engine == 'pandas':
+        return pilha.enter_context(_ler_csv_pandas(arquivo, colunas, chunksize=chunksize))
+    raise ValueError(f"Engine de leitura desconhecida: {engine}. Opções: {', '.join(ENGINES_LEITURA)}.")
+
+
+def carregar_microdados(colunas_por_arquivo=COLUNAS_MICRODADOS, engine=ENGINE_PADRAO):
+    
+    # Cada arquivo é lido uma única vez com a união das colunas usadas pelas etapas;
+    # as linhas dos arquivos arq* são alinhadas, por isso o concat por colunas.
+    partes = [
+        _ler_csv_microdados(arquivo, colunas, engine)
+        for arquivo, colunas in colunas_por_arquivo.items()
+    ]
+    microdados = pd.concat(partes, axis=1)
+    
+    print("Microdados carregados com sucesso.")
+    
+    return microdados
+
 
-def tratar_dados_gerais():
+def iterar_microdados(colunas_por_arquivo=COLUNAS_MICRODADOS, chunksize=TAMANHO_BLOCO_PADRAO, engine=ENGINE_PADRAO):
     
-    cols_arquivo1 = ['CO_IES', 'CO_CURSO', 'CO_MUNIC_CURSO','CO_UF_CURSO', 'CO_REGIAO_CURSO', 'CO_GRUPO']
-    df_info_geral = pd.read_csv(ARQUIVO_INFO_GERAL, sep=';', encoding='latin1', usecols=cols_arquivo1)
+    # Percorre os arquivos arq* em paralelo, bloco a bloco: o i-ésimo bloco de cada
+    # arquivo cobre as mesmas linhas, então a memória fica limitada por chunksize.
+    # zip_longest (e não zip) para que um arquivo com linhas a mais, que seguiria tendo
+    # blocos depois que os outros acabaram, também seja detectado.
+    with ExitStack() as pilha:
+        leitores = [
+            _iterar_csv_microdados(pilha, arquivo, colunas, chunksize, engine)
+            for arquivo, colunas in colunas_por_arquivo.items()
+        ]
     
-    cols_arquivo3 = ['TP_PR_GER']
-    df_info_prova = pd.read_csv(ARQUIVO_INFO_PROVA, sep=';', encoding='latin1', usecols=cols_arquivo3)
+        for blocos in zip_longest(*leitores):
+            if any(bloco is None for bloco in blocos) or len({len(bloco) for bloco in blocos}) > 1:
+                raise ValueError("Os arquivos de microdados não possuem o mesmo número de linhas.")
+            yield pd.concat(blocos, axis=1)
+
+
+def _campo_estavel(campo):
     
-    cols_arquivo5 = ['TP_SEXO']
-    df_info_genero = pd.read_csv(ARQUIVO_INFO_GENERO, sep=';', encoding='latin1', usecols=cols_arquivo5)
+    # Colunas só com nulos no primeiro bloco viram texto, e os índices de dicionário
+    # são alargados para int32: cada bloco traz suas próprias categorias.
+    if pa.types.is_null(campo.type):
+        return campo.with_type(pa.string())
+    if pa.types.is_dictionary(campo.type):
+        return campo.with_type(pa.dictionary(pa.int32(), campo.type.value_type, campo.type.ordered))
+    return campo
+
+
+class EscritorParquetEmBlocos:
     
-    cols_arquivo6 = ['NU_IDADE']
-    df_info_idade = pd.read_csv(ARQUIVO_INFO_IDADE, sep=';', encoding='latin1', usecols=cols_arquivo6)
+    # Grava cada bloco como um row group de um único arquivo parquet. O esquema é
+    # fixado pelo primeiro bloco e o arquivo só substitui o anterior ao final.
     
-    cols_arquivo8 = ['QE_I02']
-    df_info_raca = pd.read_csv(ARQUIVO_INFO_RACA, sep=';', encoding='latin1', usecols=cols_arquivo8)
+    def __init__(self, caminho, linhas_por_row_group=None):
+        self.caminho = caminho
+        self.linhas_por_row_group = linhas_por_row_group
+        self.caminho_temporario = f"{caminho}.tmp"
+        self.esquema = None
+        self.escritor = None
+        self.linhas = 0
     
-    df_geral = pd.concat([df_info_geral,df_info_prova, df_info_genero, df_info_idade, df_info_raca], axis=1)
+    def escrever(self, df):
+        if self.escritor is None:
+            esquema = pa.Schema.from_pandas(df, preserve_index=False)
+            campos = [_campo_estavel(campo) for campo in esquema]
+            self.esquema = pa.schema(campos, metadata=esquema.metadata)
+            self.escritor = pq.ParquetWriter(self.caminho_temporario, self.esquema, write_statistics=True)
     
-    df_geral['Desc_UF_Curso'] = df_geral['CO_UF_CURSO'].map(CO_UF_CURSO_LABELS).fillna("Não Informado")
-    df_geral['Desc_Regiao_Curso'] = df_geral['CO_REGIAO_CURSO'].map(CO_REGIAO_CURSO_LABELS).fillna("Não Informado")
-    df_geral['Desc_Raca'] = df_geral['QE_I02'].map(QE_I02_LABELS).fillna("Não Informado")
-    df_geral['Desc_Genero'] = df_geral['TP_SEXO'].map(GENDER_LABELS).fillna("Não Informado")
-    df_geral['Presenca'] = df_geral['TP_PR_GER'].map(TP_PR_GER_LABELS).fillna("Não Informado")
-    df_geral['NOME_CURSO'] = df_geral['CO_GRUPO'].map(CO_GRUPO_LABELS).fillna(df_geral['CO_GRUPO'].astype(str))
+        tabela = pa.Table.from_pandas(df, schema=self.esquema, preserve_index=False)
+        self.escritor.write_table(tabela, row_group_size=self.linhas_por_row_group)
+        self.linhas += len(df)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_erro, erro, rastro):
+        if self.escritor is not None:
+            self.escritor.close()
+            if tipo_erro is None:
+                os.replace(self.caminho_temporario, self.caminho)
+            else:
+                os.remove(self.caminho_temporario)
+        return False
+
+
+class EscritorArrow:
+    
+    # Mesma interface do escritor parquet, mas grava um arquivo Arrow IPC sem compressão.
+    # O formato de arquivo não admite trocar o dicionário de uma coluna entre lotes, então
+    # estas saídas são escritas de uma só vez.
+    
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.caminho_temporario = f"{caminho}.tmp"
+        self.escritor = None
+        self.linhas = 0
+    
+    def escrever(self, df):
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if self.escritor is None:
+            self.escritor = pa.ipc.new_file(self.caminho_temporario, tabela.schema)
+        self.escritor.write_table(tabela)
+        self.linhas += len(df)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_erro, erro, rastro):
+        if self.escritor is not None:
+            self.escritor.close()
+            if tipo_erro is None:
+                os.replace(self.caminho_temporario, self.caminho)
+            else:
+                os.remove(self.caminho_temporario)
+        return False
+
+
+def _valor_hive(valor):
+    
+    return "__HIVE_DEFAULT_PARTITION__" if pd.isna(valor) else str(valor)
+
+
+class EscritorParticao:
+    
+    # Grava a partição de uma edição (pasta NU_ANO=<ano>). Com 'particionar_por', cada
+    # valor da coluna vira uma subpasta com um único arquivo, escrito em row groups pelos
+    # blocos recebidos. Tudo é montado numa pasta oculta (ignorada pelos leitores de
+    # dataset) que só substitui a partição anterior ao final.
+    
+    def __init__(self, caminho, particionar_por=None, ordenar_por=None, formato='parquet'):
+        self.caminho = caminho
+        diretorio, nome = os.path.split(caminho)
+        self.caminho_temporario = os.path.join(diretorio, f".{nome}.tmp")
+        self.particionar_por = particionar_por
+        self.ordenar_por = ordenar_por
+        self.formato = formato
+        self.escritores = {}
+        self.linhas = 0
+    
+    def escrever(self, df):
+        if self.ordenar_por:
+            df = df.sort_values(self.ordenar_por, kind='stable')
+    
+        if self.particionar_por is None:
+            grupos = [(None, df)]
+        else:
+            grupos = df.groupby(self.particionar_por, observed=True, dropna=False, sort=False)
+    
+        for valor, parte in grupos:
+            escritor = self.escritores.get(_valor_hive(valor))
+            if escritor is None:
+                pasta = self.caminho_temporario
+                if self.particionar_por is not None:
+                    pasta = os.path.join(pasta, f"{self.particionar_por}={_valor_hive(valor)}")
+                os.makedirs(pasta, exist_ok=True)
+                if self.formato == 'arrow':
+                    escritor = EscritorArrow(os.path.join(pasta, ARQUIVO_PARTE_ARROW))
+                else:
+                    escritor = EscritorParquetEmBlocos(os.path.join(pasta, ARQUIVO_PARTE), LINHAS_POR_ROW_GROUP)
+                self.escritores[_valor_hive(valor)] = escritor
+            if self.particionar_por is not None:
+                parte = parte.drop(columns=self.particionar_por)
+            escritor.escrever(parte)
+    
+        self.linhas += len(df)
+    
+    def escrever_anexo(self, arquivo, df):
+        # Tabela auxiliar (ex.: índice) gravada na mesma pasta e trocada junto com a partição.
+        with EscritorArrow(os.path.join(self.caminho_temporario, arquivo)) as escritor:
+            escritor.escrever(df)
+    
+    def __enter__(self):
+        shutil.rmtree(self.caminho_temporario, ignore_errors=True)
+        os.makedirs(self.caminho_temporario)
+        return self
+    
+    def __exit__(self, tipo_erro, erro, rastro):
+        for escritor in self.escritores.values():
+            escritor.__exit__(tipo_erro, erro, rastro)
+    
+        if tipo_erro is not None:
+            shutil.rmtree(self.caminho_temporario, ignore_errors=True)
+            return False
+    
+        diretorio, nome = os.path.split(self.caminho)
+        antigo = os.path.join(diretorio, f".{nome}.antigo")
+        if os.path.exists(self.caminho):
+            os.replace(self.caminho, antigo)
+        os.replace(self.caminho_temporario, self.caminho)
+        shutil.rmtree(antigo, ignore_errors=True)
+        return False
+
+
+def gravar_particao(df, caminho, particionar_por=None, ordenar_por=None, formato='parquet'):
+    
+    with EscritorParticao(caminho, particionar_por, ordenar_por, formato) as escritor:
+        escritor.escrever(df)
+
+
+def _nome_curso(co_grupo):
+    
+    # Grupos fora do dicionário aparecem pelo próprio código, como categorias extras.
+    nome = decodificar(co_grupo, TABELA_GRUPO)
+    desconhecidos = nome.isna() & co_grupo.notna()
+    if desconhecidos.any():
+        codigos = co_grupo[desconhecidos].astype('int64').astype(str)
+        nome = nome.cat.add_categories(codigos.unique())
+        nome[desconhecidos] = codigos
+    
+    return nome
+
+
+def _rotular_dados_gerais(df_geral):
+    
+    # Os rótulos saem categóricos direto das tabelas compiladas de mapeamentos.py.
+    df_geral['Desc_UF_Curso'] = decodificar(df_geral['CO_UF_CURSO'], TABELA_UF_CURSO)
+    df_geral['UF_SIGLA'] = decodificar(df_geral['CO_UF_CURSO'], TABELA_UF_SIGLA)
+    df_geral['Desc_Regiao_Curso'] = decodificar(df_geral['CO_REGIAO_CURSO'], TABELA_REGIAO_CURSO)
+    df_geral['Desc_Raca'] = decodificar(df_geral['QE_I02'], TABELA_RACA)
+    df_geral['Desc_Genero'] = decodificar(df_geral['TP_SEXO'], TABELA_GENERO)
+    df_geral['Presenca'] = decodificar(df_geral['TP_PR_GER'], TABELA_PRESENCA)
+    df_geral['NOME_CURSO'] = _nome_curso(df_geral['CO_GRUPO'])
     
     df_geral['Faixa_Idade'] = pd.cut(
         df_geral['NU_IDADE'],
@@ -44,7 +457,38 @@ def tratar_dados_gerais():
         right=True
     )
     
-    df_geral.to_parquet("data/processed/dados_gerais_estudantes.parquet", index=False)
+    return _compactar_colunas(df_geral)
+
+
+def _compactar_colunas(df, categoricas=COLUNAS_CATEGORICAS, tipos=TIPOS_COMPACTOS):
+    
+    for col in categoricas:
+        df[col] = df[col].astype('category')
+    
+    # Sem nulos os códigos viram inteiros numpy sem sinal; com nulos, a versão anulável de mesma largura.
+    for col, tipo in tipos.items():
+        df[col] = df[col].astype(tipo.replace('uint', 'UInt') if df[col].hasnans else tipo)
+    
+    return df
+
+
+def tratar_dados_gerais(microdados=None, chunksize=None, engine=ENGINE_PADRAO, caminho=caminho_edicao(DIRETORIO_SAIDA_DADOS_GERAIS, ANO_PADRAO)):
+    
+    if chunksize:
+        colunas_por_arquivo = _colunas_por_arquivo(COLUNAS_DADOS_GERAIS)
+        with EscritorParticao(caminho, PARTICAO_DADOS_GERAIS, ORDEM_DADOS_GERAIS) as escritor:
+            for bloco in iterar_microdados(colunas_por_arquivo, chunksize, engine):
+                escritor.escrever(_rotular_dados_gerais(bloco[COLUNAS_DADOS_GERAIS].copy()))
+    
+        print(f"Dados gerais tratados com sucesso ({escritor.linhas} linhas, em blocos de {chunksize}).")
+        return None
+    
+    if microdados is None:
+        microdados = carregar_microdados(engine=engine)
+    
+    df_geral = _rotular_dados_gerais(microdados[COLUNAS_DADOS_GERAIS].copy())
+    
+    gravar_particao(df_geral, caminho, PARTICAO_DADOS_GERAIS, ORDEM_DADOS_GERAIS)
     print("Dados gerais tratados com sucesso.")
     
     return df_geral
@@ -59,64 +503,613 @@ def tratar_dados_idh():
     return df_idh
 
 
-def relacionar_idh_estados_nota():
+def _somar_notas_uf(microdados):
+    
+    # Estatísticas suficientes da nota por UF: com quantidade, soma e soma dos quadrados
+    # o painel obtém média e variância sem ler uma linha por estudante.
+    nota = microdados['NT_GER'].astype('float64')
+    validas = nota.notna()
+    somas = pd.DataFrame({
+        'CO_UF_CURSO': microdados.loc[validas, 'CO_UF_CURSO'],
+        'qtd_notas': 1,
+        'soma_nota': nota[validas],
+        'soma_nota_quadrado': nota[validas] ** 2,
+    })
+    
+    return somas.groupby('CO_UF_CURSO').sum().reset_index()
+
 
-    df_prova = pd.read_csv(ARQUIVO_INFO_PROVA, sep=';', encoding='latin1', usecols=['NT_GER'])
-    df_geral = pd.read_csv(ARQUIVO_INFO_GERAL, sep=';', encoding='latin1', usecols=['CO_UF_CURSO'])
+def _relacionar_idh(partes, df_idh):
     
-    df_final = pd.concat([df_geral, df_prova], axis=1)
+    # As somas de cada parte (blocos ou a base inteira) se combinam somando.
+    df_final = pd.concat(partes, ignore_index=True).groupby('CO_UF_CURSO').sum().reset_index()
+    df_final['qtd_notas'] = df_final['qtd_notas'].astype('uint32')
+    df_final['Territorialidades'] = df_final['CO_UF_CURSO'].map(CO_UF_CURSO_LABELS)
+    df_final['CO_UF_CURSO'] = df_final['CO_UF_CURSO'].astype('uint8')
     
-    if df_final['NT_GER'].dtype == 'O':
-        df_final['NT_GER'] = df_final['NT_GER'].str.replace(',', '.').astype(float)
+    return pd.merge(df_final, df_idh, on='Territorialidades', how='left')
+
+
+def relacionar_idh_estados_nota(microdados=None, df_idh=None, caminho=caminho_edicao(DIRETORIO_SAIDA_IDH_NOTAS, ANO_PADRAO)):
     
-    df_final = df_final.dropna(subset=['NT_GER'])
+    if microdados is None:
+        microdados = carregar_microdados()
     
-    df_final['Territorialidades'] = df_final['CO_UF_CURSO'].map(CO_UF_CURSO_LABELS)
+    if df_idh is None:
+        df_idh = tratar_dados_idh()
     
-    df_idh = tratar_dados_idh()
+    df_final = _relacionar_idh([_somar_notas_uf(microdados)], df_idh)
     
-    df_final = pd.merge(df_final, df_idh, on='Territorialidades', how='left')
-
-    df_final.to_parquet("data/processed/idh_notas_estudos.parquet", index=False)
+    gravar_particao(df_final, caminho, formato='arrow')
     print("Dados de IDH e nota tratados com sucesso.")
     
     return df_final
 
 
-def obter_dados_juiz_de_fora():
+def _selecionar_notas_municipios(microdados):
+    
+    # Estudantes com nota válida de todos os municípios com curso avaliado.
+    return microdados.loc[
+        microdados['CO_MUNIC_CURSO'].notna() & microdados['NT_GER'].notna(),
+        ['CO_CURSO', 'NT_GER'] + COLUNAS_CURSO_MUNICIPIOS[1:]
+    ].copy()
+
+
+def _rotular_notas_municipios(df_notas, tipos=TIPOS_COMPACTOS_MUNICIPIOS, tipo_nome_curso=None):
     
-    cols_curso = ['CO_CURSO', 'CO_MUNIC_CURSO', 'CO_CATEGAD', 'CO_MODALIDADE', 'CO_GRUPO', 'CO_IES']
+    df_notas['TIPO_IES'] = decodificar(df_notas['CO_CATEGAD'], TABELA_CATEGAD)
+    df_notas['MODALIDADE'] = decodificar(df_notas['CO_MODALIDADE'], TABELA_MODALIDADE)
+    df_notas['NOME_CURSO'] = _nome_curso(df_notas['CO_GRUPO'])
+    if tipo_nome_curso is not None:
+        df_notas['NOME_CURSO'] = df_notas['NOME_CURSO'].astype(tipo_nome_curso)
+    df_notas['CATEGORIA_COMPARACAO'] = pd.Categorical.from_codes(df_notas['CO_IES'].eq(CO_IES_UFJF).fillna(False).astype('int8'), CATEGORIAS_COMPARACAO)
     
-    df_cursos = pd.read_csv(ARQUIVO_INFO_GERAL, sep=';', encoding='latin1', usecols=cols_curso)
+    return _compactar_colunas(df_notas, COLUNAS_CATEGORICAS_MUNICIPIOS, tipos)
+
+
+def _filtrar_notas_municipios(microdados):
     
-    cursos_jf = df_cursos[df_cursos['CO_MUNIC_CURSO'] == 3136702].copy()
-    cursos_jf = cursos_jf.drop_duplicates(subset=['CO_CURSO'])
-    cursos_jf['TIPO_IES'] = cursos_jf['CO_CATEGAD'].map(CO_CATEGAD_LABELS)
-    cursos_jf['MODALIDADE'] = cursos_jf['CO_MODALIDADE'].map(CO_MODALIDADE_LABELS)
+    return _rotular_notas_municipios(_selecionar_notas_municipios(microdados))
+
+
+def _indexar_municipios(df_notas, inicio=0):
     
-    lista_ids_jf = cursos_jf['CO_CURSO'].unique()
+    # Ordena as notas por município e devolve a tabela e o índice com a faixa de linhas
+    # de cada município (a partir de 'inicio', a linha do lote no arquivo); a UF sai dos
+    # dois primeiros dígitos do código IBGE.
+    df_notas = df_notas.sort_values(ORDEM_NOTAS_MUNICIPIOS, kind='stable').reset_index(drop=True)
     
-    df_notas = pd.read_csv(ARQUIVO_INFO_PROVA, sep=';', encoding='latin1', decimal=',', usecols=['CO_CURSO', 'NT_GER'], dtype={'NT_GER': str})
-    df_notas['NT_GER'] = pd.to_numeric(df_notas['NT_GER'].str.strip().str.replace(',','.'), errors='coerce')
-    df_notas = df_notas.dropna(subset=['NT_GER'])
-   
-    df_notas_jf = df_notas[df_notas['CO_CURSO'].isin(lista_ids_jf)].dropna()
+    linhas = df_notas.groupby('CO_MUNIC_CURSO', sort=True).size()
+    indice = pd.DataFrame({
+        'CO_MUNIC_CURSO': linhas.index.astype('uint32'),
+        'UF_SIGLA': decodificar(pd.Series(linhas.index // 100000), TABELA_UF_SIGLA).values,
+        'inicio': (inicio + linhas.cumsum() - linhas).astype('int64').values,
+        'linhas': linhas.astype('int64').values,
+    })
     
-    df_analise_jf = pd.merge(df_notas_jf, cursos_jf, on='CO_CURSO', how='inner')
-    df_analise_jf.to_parquet('data/processed/analise_munic_jf.parquet', index=False)
+    return df_notas, indice
+
+
+def _histogramas_notas(df_notas):
     
-    print("Dados de Juiz de Fora tratados com sucesso.")
+    # Uma linha por grupo de cada nível, com a contagem de alunos em cada faixa de nota;
+    # os níveis acima do curso levam 0 nos códigos que não os definem.
+    nota = df_notas['NT_GER'].astype('float64')
+    faixa = nota.floordiv(100 / FAIXAS_HISTOGRAMA).clip(0, FAIXAS_HISTOGRAMA - 1).astype('int64').to_numpy()
+    momentos = pd.DataFrame({'qtd': 1, 'soma_nota': nota, 'soma_nota_quadrado': nota ** 2})
+    niveis = []
+    for nivel, colunas in NIVEIS_HISTOGRAMA.items():
+        # Com sort=True, o número de cada grupo (ngroup) é a posição da linha no resumo.
+        chaves = [df_notas[col] for col in ['CO_MUNIC_CURSO'] + colunas]
+        grupos = momentos.groupby(chaves, sort=True, observed=True, dropna=False)
+        contagens = np.bincount(grupos.ngroup().to_numpy() * FAIXAS_HISTOGRAMA + faixa, minlength=grupos.ngroups * FAIXAS_HISTOGRAMA)
+        resumo = grupos.sum()
+        resumo['mediana'] = nota.groupby(chaves, sort=True, observed=True, dropna=False).median()
+        if nivel == 'curso':
+            resumo['NOME_CURSO'] = df_notas['NOME_CURSO'].groupby(chaves, sort=True, observed=True, dropna=False).first()
+        resumo = resumo.reset_index()
+        resumo['NIVEL'] = nivel
+        resumo['contagens'] = list(contagens.reshape(-1, FAIXAS_HISTOGRAMA).astype('uint32'))
+        niveis.append(resumo)
     
-    return df_analise_jf
+    histogramas = pd.concat(niveis, ignore_index=True)
+    for col in ['CO_IES', 'CO_CURSO']:
+        histogramas[col] = histogramas[col].fillna(0)
+    histogramas['NIVEL'] = pd.Categorical(histogramas['NIVEL'], categories=list(NIVEIS_HISTOGRAMA))
+    histogramas['qtd'] = histogramas['qtd'].astype('uint32')
+    histogramas = _compactar_colunas(histogramas, ['NOME_CURSO'], {col: TIPOS_COMPACTOS_MUNICIPIOS[col] for col in ORDEM_NOTAS_MUNICIPIOS})
+    
+    # Município, depois cada IES seguida dos seus cursos: as linhas de um município são contíguas.
+    return histogramas.sort_values(ORDEM_NOTAS_MUNICIPIOS, kind='stable').reset_index(drop=True)
+
 
+def gravar_lotes_municipios(lotes, caminho):
     
-if __name__ == "__main__":
-    tratar_dados_gerais()
-    tratar_dados_idh()
-    relacionar_idh_estados_nota()
-    obter_dados_juiz_de_fora()
+    # Cada lote traz municípios completos e vem em ordem crescente de município, então os
+    # lotes são gravados um após o outro e só o índice e os histogramas (um resumo por
+    # grupo) ficam em memória até o fim.
+    indices = []
+    histogramas = []
+    with EscritorParticao(caminho, formato='arrow') as escritor:
+        for df_notas in lotes:
+            df_notas, indice = _indexar_municipios(df_notas, escritor.linhas)
+            escritor.escrever(df_notas)
+            indices.append(indice)
+            histogramas.append(_histogramas_notas(df_notas))
+    
+        indice = pd.concat(indices, ignore_index=True)
+        histogramas = pd.concat(histogramas, ignore_index=True)
+        linhas = histogramas.groupby('CO_MUNIC_CURSO', sort=True).size().to_numpy()
+        indice['inicio_histogramas'] = (linhas.cumsum() - linhas).astype('int64')
+        indice['linhas_histogramas'] = linhas.astype('int64')
+        escritor.escrever_anexo(ARQUIVO_INDICE_MUNICIPIOS, indice)
+        escritor.escrever_anexo(ARQUIVO_HISTOGRAMAS_NOTAS, histogramas)
+    
+    print(f"Notas por município tratadas com sucesso ({len(indice)} municípios).")
+    
+    return escritor.linhas
+
+
+def gravar_notas_municipios(df_notas, caminho):
+    
+    gravar_lotes_municipios([df_notas], caminho)
+    
+    return df_notas
+
+
+def _intercalar_municipios(caminhos, linhas_por_lote):
+    
+    # Intercala sequências já ordenadas por ORDEM_NOTAS_MUNICIPIOS (uma por bloco) lendo
+    # cada uma aos poucos. Um município abaixo do último já lido de cada sequência não
+    # tem mais linhas por vir: esses municípios saem juntos, na ordem dos blocos, o que
+    # reproduz a ordenação estável da base inteira. A memória fica em torno de
+    # linhas_por_lote (mais o maior município, que precisa estar inteiro).
+    leitores = [pq.ParquetFile(caminho).iter_batches(batch_size=max(1, linhas_por_lote // len(caminhos))) for caminho in caminhos]
+    pendentes = [None] * len(caminhos)
+    abertos = set(range(len(caminhos)))
+    
+    def carregar(i):
+        lote = next(leitores[i], None)
+        if lote is None:
+            abertos.discard(i)
+        else:
+            pendentes[i] = pd.concat([pendentes[i], lote.to_pandas()], ignore_index=True)
+    
+    prontos = []
+    while abertos:
+        for i in list(abertos):
+            while i in abertos and (pendentes[i] is None or pendentes[i].empty):
+                carregar(i)
+        if not abertos:
+            break
+    
+        limite = min(pendentes[i]['CO_MUNIC_CURSO'].iat[-1] for i in abertos)
+        saidas = 0
+        for i, pendente in enumerate(pendentes):
+            if pendente is None:
+                continue
+            corte = pendente['CO_MUNIC_CURSO'].searchsorted(limite, side='left')
+            if corte:
+                prontos.append(pendente.iloc[:corte])
+                pendentes[i] = pendente.iloc[corte:].reset_index(drop=True)
+                saidas += corte
+        if not saidas:
+            # Nenhum município completo: a sequência que define o limite ainda está nele.
+            for i in [i for i in abertos if pendentes[i]['CO_MUNIC_CURSO'].iat[-1] == limite]:
+                carregar(i)
+        if sum(len(pronto) for pronto in prontos) >= linhas_por_lote:
+            yield pd.concat(prontos, ignore_index=True)
+            prontos = []
+    
+    prontos += [pendente for pendente in pendentes if pendente is not None and not pendente.empty]
+    if prontos:
+        yield pd.concat(prontos, ignore_index=True)
+
+
+def obter_notas_municipios(microdados=None, caminho=caminho_edicao(DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ANO_PADRAO)):
+    
+    if microdados is None:
+        microdados = carregar_microdados()
+    
+    return gravar_notas_municipios(_filtrar_notas_municipios(microdados), caminho)
+
+
+def _agregar_cubo(df_geral):
+    
+    # Mesma regra de presença usada no painel: rótulos de Presenca que contêm "presente".
+    nota = df_geral['NT_GER'].astype('float64')
+    medidas = pd.DataFrame({
+        'qtd': 1,
+        'qtd_presentes': df_geral['Presenca'].astype('category').str.contains('presente', case=False, na=False).astype('int64'),
+        'qtd_idade': df_geral['NU_IDADE'].notna().astype('int64'),
+        'soma_idade': df_geral['NU_IDADE'].astype('float64'),
+        'qtd_notas': nota.notna().astype('int64'),
+        'soma_nota': nota,
+        'soma_nota_quadrado': nota ** 2,
+    }, index=df_geral.index)
+    
+    chaves = [df_geral[dim] for dim in DIMENSOES_CUBO]
+    return medidas.groupby(chaves, observed=True, dropna=False).sum(min_count=0).reset_index()
+
+
+def _combinar_cubos(partes):
+    
+    # As medidas são somas, então cubos parciais (de blocos ou edições) se combinam somando.
+    cubo = pd.concat(partes, ignore_index=True)
+    cubo = cubo.groupby(DIMENSOES_CUBO, observed=True, dropna=False)[MEDIDAS_CUBO].sum().reset_index()
+    return _compactar_cubo(cubo)
+
+
+def _compactar_cubo(cubo):
+    
+    for dim in DIMENSOES_CUBO[1:]:
+        cubo[dim] = cubo[dim].astype('category')
+    cubo['CO_UF_CURSO'] = cubo['CO_UF_CURSO'].astype('UInt8')
+    
+    return cubo
+
+
+def gerar_cubo_estudantes(df_geral=None, caminho_dados_gerais=caminho_edicao(DIRETORIO_SAIDA_DADOS_GERAIS, ANO_PADRAO), caminho=caminho_edicao(DIRETORIO_SAIDA_CUBO, ANO_PADRAO)):
+    
+    if df_geral is None:
+        df_geral = pd.read_parquet(caminho_dados_gerais, columns=DIMENSOES_CUBO + ['NU_IDADE', 'NT_GER'])
+    
+    cubo = _compactar_cubo(_agregar_cubo(df_geral))
+    
+    gravar_particao(cubo, caminho, formato='arrow')
+    print(f"Cubo de agregados gerado com sucesso ({len(cubo)} combinações).")
+    
+    return cubo
+
+
+def processar_em_blocos(chunksize=TAMANHO_BLOCO_PADRAO, engine=ENGINE_PADRAO, ano=ANO_PADRAO):
+    
+    # Modo de memória limitada: uma única passada pelos arquivos da edição alimenta todas
+    # as saídas dela.
+    df_idh = tratar_dados_idh()
+    diretorio_temporario = os.path.dirname(ARQUIVO_CACHE_MICRODADOS)
+    os.makedirs(diretorio_temporario, exist_ok=True)
+    
+    with ExitStack() as pilha:
+        gerais = pilha.enter_context(EscritorParticao(caminho_edicao(DIRETORIO_SAIDA_DADOS_GERAIS, ano), PARTICAO_DADOS_GERAIS, ORDEM_DADOS_GERAIS))
+        sequencias = pilha.enter_context(tempfile.TemporaryDirectory(prefix='.notas_municipios', dir=diretorio_temporario))
+        caminhos_sequencias = []
+        partes_idh = []
+        partes_cubo = []
+        grupos = set()
+        com_nulos = set()
+    
+        for bloco in iterar_microdados(colunas_microdados(ano), chunksize, engine):
+            df_geral = _rotular_dados_gerais(bloco[COLUNAS_DADOS_GERAIS].copy())
+            gerais.escrever(df_geral)
+            # O cubo parcial de cada bloco é somado ao acumulado na hora, para que a memória
+            # dependa do número de combinações e não do número de blocos.
+            partes_cubo = [_combinar_cubos(partes_cubo + [_agregar_cubo(df_geral)])]
+            partes_idh.append(_somar_notas_uf(bloco))
+    
+            # As notas por município saem ordenadas por bloco em arquivos temporários,
+            # intercalados ao final; os rótulos só são aplicados na intercalação.
+            df_notas = _selecionar_notas_municipios(bloco).sort_values(ORDEM_NOTAS_MUNICIPIOS, kind='stable')
+            caminhos_sequencias.append(os.path.join(sequencias, f"bloco-{len(caminhos_sequencias):05d}.parquet"))
+            df_notas.to_parquet(caminhos_sequencias[-1], index=False)
+            grupos.update(df_notas['CO_GRUPO'].dropna().unique())
+            com_nulos.update(col for col in TIPOS_COMPACTOS_MUNICIPIOS if df_notas[col].hasnans)
+    
+        linhas = gerais.linhas
+        print(f"Dados gerais tratados com sucesso ({linhas} linhas, em blocos de {chunksize}).")
+    
+        cubo, = partes_cubo
+        gravar_particao(cubo, caminho_edicao(DIRETORIO_SAIDA_CUBO, ano), formato='arrow')
+        print(f"Cubo de agregados gerado com sucesso ({len(cubo)} combinações).")
+    
+        gravar_particao(_relacionar_idh(partes_idh, df_idh), caminho_edicao(DIRETORIO_SAIDA_IDH_NOTAS, ano), formato='arrow')
+        print("Dados de IDH e nota tratados com sucesso.")
+    
+        # O arquivo Arrow exige o mesmo esquema em todos os lotes: tipos anuláveis e
+        # categorias de curso são decididos pelo que apareceu em todos os blocos.
+        tipos = {col: tipo.replace('uint', 'UInt') if col in com_nulos else tipo for col, tipo in TIPOS_COMPACTOS_MUNICIPIOS.items()}
+        tipo_nome_curso = _nome_curso(pd.Series(sorted(grupos), dtype='float64')).dtype
+        lotes = (_rotular_notas_municipios(lote, tipos, tipo_nome_curso) for lote in _intercalar_municipios(caminhos_sequencias, chunksize))
+        gravar_lotes_municipios(lotes, caminho_edicao(DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ano))
+    
+    return linhas
+
+
+def salvar_cache_microdados(microdados, caminho=ARQUIVO_CACHE_MICRODADOS):
+    
+    _garantir_diretorio(caminho)
+    microdados.to_parquet(caminho, index=False)
+
+
+def caminho_parte_microdados(caminho_cache, arquivo):
+    
+    return f"{os.path.splitext(caminho_cache)[0]}-{os.path.splitext(os.path.basename(arquivo))[0]}.parquet"
+
+
+def ler_parte_microdados(arquivo, colunas, engine, caminho_parte):
     
+    # Leitura de um arquivo arq* no pool: as colunas vão para um parquet temporário e só o
+    # número de linhas volta ao processo principal, em vez do DataFrame serializado.
+    microdados = _ler_csv_microdados(arquivo, colunas, engine)
+    salvar_cache_microdados(microdados, caminho_parte)
     
+    return len(microdados)
+
+
+def montar_microdados(caminho_cache, caminhos_partes, *_):
+    
+    # As partes (uma por arquivo arq*) cobrem as mesmas linhas; viram o cache e são apagadas.
+    # Devolve o caminho do cache, de onde cada saída lê só as colunas que usa.
+    microdados = pd.concat([pd.read_parquet(caminho) for caminho in caminhos_partes], axis=1)
+    salvar_cache_microdados(microdados, caminho_cache)
+    for caminho in caminhos_partes:
+        os.remove(caminho)
+    print(f"Microdados carregados com sucesso ({caminho_cache}).")
+    
+    return caminho_cache
+
+
+def cache_microdados(caminho_cache):
+    # Cache já atualizado pelo manifesto: as saídas leem dele diretamente.
+    return caminho_cache
+
+
+def construir_saida(nome, caminho, caminho_microdados, df_idh=None):
+    
+    # Ponto de entrada das etapas de saída no pool de processos: cada uma lê do cache só as
+    # colunas de que precisa e devolve o número de linhas gravadas, para que nenhum
+    # DataFrame grande seja serializado entre processos.
+    microdados = pd.read_parquet(caminho_microdados, columns=COLUNAS_SAIDA.get(nome))
+    if nome == 'dados_gerais_estudantes':
+        df = tratar_dados_gerais(microdados, caminho=caminho)
+    elif nome == 'idh_notas_uf':
+        df = relacionar_idh_estados_nota(microdados, df_idh, caminho=caminho)
+    elif nome == 'notas_municipios':
+        df = obter_notas_municipios(microdados, caminho=caminho)
+    else:
+        raise KeyError(f"Saída desconhecida: {nome}")
     
+    return len(df)
+
+
+def construir_cubo(caminho_dados_gerais, caminho, *_):
+    
+    # Lê a base de estudantes já gravada; a dependência no grafo só garante a ordem.
+    return len(gerar_cubo_estudantes(caminho_dados_gerais=caminho_dados_gerais, caminho=caminho))
+
+
+def etapas_edicao(ano=ANO_PADRAO):
+    
+    # Código de escrita comum às saídas: a partição e o escritor de cada formato.
+    escrita_parquet = [EscritorParticao, EscritorParquetEmBlocos, _campo_estavel, _valor_hive, ARQUIVO_PARTE, LINHAS_POR_ROW_GROUP]
+    escrita_arrow = [EscritorParticao, EscritorArrow, _valor_hive, ARQUIVO_PARTE_ARROW]
+    
+    return {
+        'microdados': {
+            'saida': caminho_cache_microdados(ano),
+            'entradas': list(colunas_microdados(ano)),
+            'codigo': [COLUNAS_POR_ARQUIVO, esquema_microdados, carregar_microdados, ler_parte_microdados, caminho_parte_microdados, montar_microdados, _ler_csv_microdados, _ler_csv_pandas, _ler_csv_arrow, _opcoes_csv_arrow, salvar_cache_microdados, _garantir_diretorio],
+        },
+        'dados_gerais_estudantes': {
+            'saida': caminho_edicao(DIRETORIO_SAIDA_DADOS_GERAIS, ano),
+            'entradas': [caminho_cache_microdados(ano)],
+            'codigo': [mapeamentos, COLUNAS_DADOS_GERAIS, COLUNAS_SAIDA, COLUNAS_CATEGORICAS, TIPOS_COMPACTOS, PARTICAO_DADOS_GERAIS, ORDEM_DADOS_GERAIS, construir_saida, tratar_dados_gerais, _rotular_dados_gerais, _nome_curso, _compactar_colunas] + escrita_parquet,
+        },
+        'idh_notas_uf': {
+            'saida': caminho_edicao(DIRETORIO_SAIDA_IDH_NOTAS, ano),
+            'entradas': [caminho_cache_microdados(ano), ARQUIVO_IDH],
+            'codigo': [mapeamentos, COLUNAS_SAIDA, construir_saida, relacionar_idh_estados_nota, _somar_notas_uf, _relacionar_idh, tratar_dados_idh] + escrita_arrow,
+        },
+        'notas_municipios': {
+            'saida': caminho_edicao(DIRETORIO_SAIDA_NOTAS_MUNICIPIOS, ano),
+            'entradas': [caminho_cache_microdados(ano)],
+            'codigo': [mapeamentos, COLUNAS_CURSO_MUNICIPIOS, COLUNAS_SAIDA, COLUNAS_CATEGORICAS_MUNICIPIOS, TIPOS_COMPACTOS_MUNICIPIOS, ORDEM_NOTAS_MUNICIPIOS, ARQUIVO_INDICE_MUNICIPIOS, ARQUIVO_HISTOGRAMAS_NOTAS, FAIXAS_HISTOGRAMA, NIVEIS_HISTOGRAMA, construir_saida, obter_notas_municipios, CATEGORIAS_COMPARACAO, _nome_curso, _selecionar_notas_municipios, _rotular_notas_municipios, _filtrar_notas_municipios, _indexar_municipios, _histogramas_notas, gravar_lotes_municipios, gravar_notas_municipios, _compactar_colunas] + escrita_arrow,
+        },
+        'cubo_estudantes': {
+            'saida': caminho_edicao(DIRETORIO_SAIDA_CUBO, ano),
+            'entradas': [caminho_edicao(DIRETORIO_SAIDA_DADOS_GERAIS, ano)],
+            'codigo': [DIMENSOES_CUBO, MEDIDAS_CUBO, construir_cubo, gerar_cubo_estudantes, _agregar_cubo, _compactar_cubo] + escrita_arrow,
+            'depende_de': 'dados_gerais_estudantes',
+        },
+    }
+
+
+SAIDAS_ETL = ['dados_gerais_estudantes', 'idh_notas_uf', 'notas_municipios', 'cubo_estudantes']
+SAIDAS_COM_IDH = ['idh_notas_uf']
+
+
+def montar_grafo_etl(anos=(ANO_PADRAO,), somente=None, forcar=False, engine=ENGINE_PADRAO, manifesto=None):
+    
+    # Monta o grafo só com o que precisa ser refeito: leituras brutas (uma por arquivo
+    # arq*), montagem/cache dos microdados, IDH e as saídas de cada edição. Devolve as
+    # etapas e, para cada nó que produz uma saída registrável, a chave do manifesto.
+    manifesto = carregar_manifesto() if manifesto is None else manifesto
+    grafo, registros = [], {}
+    
+    for ano in anos:
+        etapas = etapas_edicao(ano)
+        chave_cache = f"microdados/{ano}"
+        cache_atualizado = not forcar and etapa_atualizada(chave_cache, etapas['microdados'], manifesto)
+    
+        saidas = [
+            nome for nome in somente or SAIDAS_ETL
+            if forcar or not cache_atualizado or not etapa_atualizada(f"{nome}/{ano}", etapas[nome], manifesto)
+        ]
+        # Saídas derivadas de outra saída que será refeita também precisam ser refeitas.
+        saidas += [
+            nome for nome in somente or SAIDAS_ETL
+            if nome not in saidas and etapas[nome].get('depende_de') in saidas
+        ]
+        for nome in sorted(set(somente or SAIDAS_ETL) - set(saidas)):
+            print(f"{nome}/{ano}: entradas e código inalterados, etapa ignorada.")
+        if not saidas:
+            continue
+    
+        no_microdados = f"microdados:{ano}"
+        precisa_microdados = any('depende_de' not in etapas[nome] for nome in saidas)
+        if precisa_microdados and cache_atualizado:
+            grafo.append(Etapa(no_microdados, partial(cache_microdados, etapas['microdados']['saida'])))
+        elif precisa_microdados:
+            leituras, partes = [], []
+            for arquivo, colunas in colunas_microdados(ano).items():
+                no_leitura = f"ler:{ano}:{os.path.basename(arquivo)}"
+                partes.append(caminho_parte_microdados(etapas['microdados']['saida'], arquivo))
+                grafo.append(Etapa(no_leitura, partial(ler_parte_microdados, arquivo, colunas, engine, partes[-1])))
+                leituras.append(no_leitura)
+            grafo.append(Etapa(no_microdados, partial(montar_microdados, etapas['microdados']['saida'], partes), tuple(leituras)))
+            registros[no_microdados] = (chave_cache, etapas['microdados'])
+    
+        for nome in saidas:
+            no_saida = f"{nome}:{ano}"
+            origem = etapas[nome].get('depende_de')
+            if origem is not None:
+                dependencias = (f"{origem}:{ano}",) if origem in saidas else ()
+                funcao = partial(construir_cubo, etapas[origem]['saida'], etapas[nome]['saida'])
+            else:
+                dependencias = (no_microdados, 'idh') if nome in SAIDAS_COM_IDH else (no_microdados,)
+                funcao = partial(construir_saida, nome, etapas[nome]['saida'])
+            grafo.append(Etapa(no_saida, funcao, dependencias))
+            registros[no_saida] = (f"{nome}/{ano}", etapas[nome])
+    
+    if any('idh' in etapa.dependencias for etapa in grafo):
+        grafo.append(Etapa('idh', tratar_dados_idh))
+    
+    return grafo, registros
+
+
+def gravar_relatorio(relatorio, caminho=None):
+    
+    if caminho is None:
+        caminho = os.path.join(DIRETORIO_RELATORIOS, f"etl-{relatorio['inicio'].replace(':', '')}.json")
+    _garantir_diretorio(caminho)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"Relatório da execução gravado com sucesso ({caminho}).")
+    
+    return caminho
+
+
+def estudantes_edicao(ano, medidas):
+    
+    # No modo em blocos a etapa devolve o número de estudantes; no grafo, ele está nos
+    # metadados do cache de microdados, que existe ao fim de qualquer execução normal.
+    medida = medidas.get(f"processar_em_blocos:{ano}")
+    if medida is not None:
+        return medida['linhas_saida']
+    caminho = caminho_cache_microdados(ano)
+    
+    return pq.ParquetFile(caminho).metadata.num_rows if os.path.exists(caminho) else None
+
+
+def normalizar_vazao(medidas):
+    
+    # linhas/s de cada etapa de uma edição é medido sobre os estudantes da edição, não sobre
+    # as linhas que a etapa recebe ou devolve (as 27 UFs do IDH, as combinações do cubo):
+    # assim as etapas são comparáveis entre si. Etapas sem edição (o IDH) ficam sem linhas/s.
+    estudantes = {}
+    for nome, medida in medidas.items():
+        ano = next((int(parte) for parte in nome.split(':') if parte.isdigit()), None)
+        if ano is not None and ano not in estudantes:
+            estudantes[ano] = estudantes_edicao(ano, medidas)
+        linhas = estudantes.get(ano)
+        medida['linhas_por_segundo'] = round(linhas / medida['segundos']) if linhas and medida['segundos'] else None
+    
+    return medidas
+
+
+def _executar_instrumentado(grafo, parametros, workers=None, ao_concluir=None, relatorio=None, perfil=None):
+    
+    inicio_execucao = datetime.now()
+    inicio = time.perf_counter()
+    resultados, medidas = executar_grafo(grafo, workers=workers, ao_concluir=ao_concluir, diretorio_perfil=perfil)
+    tempo_total = time.perf_counter() - inicio
+    normalizar_vazao(medidas)
+    
+    relatorio_grafo(grafo, medidas, tempo_total)
+    gravar_relatorio(relatorio_execucao(grafo, medidas, tempo_total, inicio_execucao, parametros), relatorio)
+    if perfil:
+        print(f"Perfis do cProfile gravados com sucesso ({perfil}).")
+    
+    return resultados
+
+
+def executar_etl(anos=(ANO_PADRAO,), somente=None, forcar=False, engine=ENGINE_PADRAO, workers=None, relatorio=None, perfil=None):
+    
+    # Reconstrói apenas as saídas cujas entradas (hash do conteúdo) ou código mudaram
+    # desde a última execução registrada no manifesto; etapas independentes rodam em
+    # paralelo em um pool de processos.
+    manifesto = carregar_manifesto()
+    grafo, registros = montar_grafo_etl(anos, somente, forcar, engine, manifesto)
+    if not grafo:
+        salvar_manifesto(manifesto)
+        return
+    
+    def registrar(nome, resultado, medida):
+        if nome in registros:
+            chave, etapa = registros[nome]
+            registrar_etapa(chave, etapa, manifesto)
+            salvar_manifesto(manifesto)
+    
+    parametros = {'anos': list(anos), 'somente': somente, 'forcar': forcar, 'engine': engine, 'workers': workers}
+    _executar_instrumentado(grafo, parametros, workers, registrar, relatorio, perfil)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL dos microdados do ENADE.")
+    parser.add_argument(
+        '--chunksize', type=int, default=None,
+        help=f"Processa os microdados em blocos de N linhas, com memória limitada (ex.: {TAMANHO_BLOCO_PADRAO})."
+    )
+    parser.add_argument(
+        '--engine', choices=ENGINES_LEITURA, default=ENGINE_PADRAO,
+        help="Leitor dos arquivos CSV de microdados."
+    )
+    parser.add_argument(
+        '--only', nargs='+', choices=SAIDAS_ETL, default=None,
+        help="Limita a execução às saídas indicadas."
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Reconstrói as saídas mesmo que o manifesto indique que estão atualizadas."
+    )
+    parser.add_argument(
+        '--anos', nargs='+', type=int, default=[ANO_PADRAO],
+        help="Edições do ENADE a processar (ex.: 2019 2021 2023)."
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="Número de processos do pool; 1 executa tudo no processo atual. Padrão: número de CPUs."
+    )
+    parser.add_argument(
+        '--relatorio', default=None,
+        help=f"Arquivo JSON do relatório da execução. Padrão: um arquivo por execução em {DIRETORIO_RELATORIOS}."
+    )
+    parser.add_argument(
+        '--perfil', default=None,
+        help="Pasta onde gravar um perfil do cProfile (.prof) por etapa."
+    )
+    args = parser.parse_args()
+    
+    if args.chunksize:
+        # O modo em blocos não passa pelo cache intermediário e sempre refaz as saídas. O
+        # manifesto registra as saídas a partir desse cache, então os registros da edição são
+        # descartados antes: a próxima execução normal refaz o que o modo em blocos gravou.
+        # Cada edição pedida é uma etapa, executadas uma após a outra no processo atual.
+        manifesto = carregar_manifesto()
+        for ano in args.anos:
+            for nome in SAIDAS_ETL:
+                manifesto['saidas'].pop(f"{nome}/{ano}", None)
+        salvar_manifesto(manifesto)
+        etapas = [Etapa(f"processar_em_blocos:{ano}", partial(processar_em_blocos, args.chunksize, args.engine, ano)) for ano in args.anos]
+        parametros = {'anos': args.anos, 'chunksize': args.chunksize, 'engine': args.engine}
+        _executar_instrumentado(etapas, parametros, workers=1, relatorio=args.relatorio, perfil=args.perfil)
+    else:
+        executar_etl(
+            anos=args.anos, somente=args.only, forcar=args.force, engine=args.engine,
+            workers=args.workers, relatorio=args.relatorio, perfil=args.perfil
+        )
+
+
+
+
 
-    
\ No newline at end of file